@@ -1,7 +1,8 @@
 import csv
 import time
 from fifteenpuzzle import fifteen_Puzzle_State, FifteenPuzzleSearchProblem
-from search import aStarSearch, h1, h2, h3, h4, h5
+from search import aStarSearch, h1, h2, h3, h4, h5, h6, h7
+from util import BudgetExceeded
 
 
 def read_scenarios(file_path):
@@ -38,7 +39,14 @@ def check_if_solvable(puzzle):
         return inversions % 2 == 0
 
 
-def solve_puzzles(configurations, heuristics):
+def solve_puzzles(configurations, heuristics, search_method=aStarSearch, time_limit=None):
+    """
+    Solves every solvable configuration with each heuristic.  search_method can
+    be any informed search taking (problem, heuristic) and returning
+    (actions, nodes expanded, max fringe size, branching factor), such as
+    aStarSearch or idaStarSearch.  With a time_limit in seconds, each run is
+    given that deadline and recorded as "Timeout" when it runs out.
+    """
     results = []
     for i, config in enumerate(configurations):
         print(f"Solving puzzle {i + 1}/{len(configurations)} with configuration: {config}")
@@ -52,13 +60,18 @@ def solve_puzzles(configurations, heuristics):
         problem = FifteenPuzzleSearchProblem(puzzle_state)
         for heuristic in heuristics:
             print(f"Using heuristic: {heuristic.__name__}")
-            start_time = time.time()
 
-            # Ensure aStarSearch is properly returning results
-            actions, nodes_expanded, max_fringe, bf = aStarSearch(problem, heuristic)
-            elapsed_time = time.time() - start_time
+            # Ensure the search method is properly returning results
+            if time_limit is None:
+                result = search_method(problem, heuristic)
+            else:
+                result = search_method(problem, heuristic, deadline=time.monotonic() + time_limit)
+            actions, nodes_expanded, max_fringe, bf = result
+            elapsed_time = result.total_ns / 1e9
 
-            if actions is None or len(actions) == 0:  # Check for both None and empty list
+            if isinstance(result, BudgetExceeded):
+                results.append([temp, heuristic.__name__, "Timeout", -1, nodes_expanded, max_fringe, bf])
+            elif actions is None or len(actions) == 0:  # Check for both None and empty list
                 results.append([temp, heuristic.__name__, "Unsolved", -1, nodes_expanded, max_fringe, bf])
             else:
                 solution_depth = len(actions)
@@ -100,12 +113,13 @@ def write_results_to_csv(results, filename):
 
 
 def main():
-    HEURISTICS = [h1, h2, h3, h4,h5]
+    HEURISTICS = [h1, h2, h3, h4,h5, h6, h7]
+    TIME_LIMIT = 60  # Seconds per puzzle and heuristic
 
     # Read the puzzle configurations from the CSV file
     configurations = read_scenarios('Scenario.csv')
     print(configurations)
-    write_results_to_csv(solve_puzzles(configurations, HEURISTICS), "results.csv")
+    write_results_to_csv(solve_puzzles(configurations, HEURISTICS, time_limit=TIME_LIMIT), "results.csv")
 
 
 if __name__ == "__main__":
@@ -1,7 +1,8 @@
 import csv
 import time
 from fifteenpuzzle import fifteen_Puzzle_State, FifteenPuzzleSearchProblem
-from search import depthFirstSearch, breadthFirstSearch, uniformCostSearch
+from search import iterativeDeepeningSearch, breadthFirstSearch, bidirectionalBreadthFirstSearch, uniformCostSearch
+from util import BudgetExceeded
 
 
 def read_scenarios(file_path):
@@ -70,7 +71,12 @@ def check_if_solvable(puzzle):
         return inversions % 2 == 0
 
 
-def solve_puzzles(configurations, search_methods):
+def solve_puzzles(configurations, search_methods, time_limit=None):
+    """
+    Runs every search method on each solvable configuration.  With a
+    time_limit in seconds, each run is given that deadline and recorded as
+    "Timeout" when it runs out.
+    """
     results = []
     for i, config in enumerate(configurations):
         print(f"Solving puzzle {i + 1}/{len(configurations)} with configuration: {config}")
@@ -85,13 +91,18 @@ def solve_puzzles(configurations, search_methods):
 
         for search_method in search_methods:
             print(f"Using search method: {search_method.__name__}")
-            start_time = time.time()
 
             # Adapt to the method's return values
-            result = search_method(problem)
-            elapsed_time = time.time() - start_time
+            if time_limit is None:
+                result = search_method(problem)
+            else:
+                result = search_method(problem, deadline=time.monotonic() + time_limit)
+            elapsed_time = result.total_ns / 1e9
 
-            if result is None or len(result) == 0:
+            if isinstance(result, BudgetExceeded):
+                results.append([temp, search_method.__name__,
+                                "Timeout", -1, result.nodes_expanded, result.fringe_size, -1])
+            elif result is None or len(result) == 0:
                 results.append([temp, search_method.__name__,
                                 "Unsolved", -1, -1, -1, -1])
             else:
@@ -107,13 +118,14 @@ def solve_puzzles(configurations, search_methods):
 
 
 def main():
-    SEARCH_METHODS = [depthFirstSearch, breadthFirstSearch, uniformCostSearch]
+    SEARCH_METHODS = [iterativeDeepeningSearch, breadthFirstSearch, bidirectionalBreadthFirstSearch, uniformCostSearch]
+    TIME_LIMIT = 60  # Seconds per puzzle and search method
 
     # Read the puzzle configurations from the CSV file
     configurations = read_scenarios('Scenario.csv')
     print(configurations)
     write_results_to_csv(solve_puzzles(
-        configurations, SEARCH_METHODS), "results2.csv")
+        configurations, SEARCH_METHODS, time_limit=TIME_LIMIT), "results2.csv")
 
 
 if __name__ == "__main__":
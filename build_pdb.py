@@ -0,0 +1,94 @@
+# build_pdb.py
+# ------------
+# Command-line entry point for building and checking the pattern databases of
+# patterndb.py.
+#
+#   python build_pdb.py 5-5-5 --workers 4
+#   python build_pdb.py 1,2,3,5,6 4,7,8,11,12 --directory /data/pdb
+#   python build_pdb.py 6-6-3 --verify
+#   python build_pdb.py 5-5-5 --storage mod3
+#   python build_pdb.py 5-5-5 --measure 20
+import argparse
+import os
+import random
+import time
+
+import fifteenpuzzle
+import patterndb
+import search
+
+
+def parsePatterns(specs):
+    """
+    Turns partition names and comma-separated tile lists into patterns.
+    """
+    patterns = []
+    for spec in specs:
+        if spec in patterndb.PARTITIONS:
+            patterns.extend(patterndb.PARTITIONS[spec])
+        else:
+            patterns.append(tuple(int(tile) for tile in spec.split(',')))
+    return patterns
+
+
+def measureStorage(patterns, directory, count, moves=150, factors=(2, 4, 12), seed=0):
+    """
+    Solves count random puzzles, scrambled by the given number of moves,
+    with A* under every storage of the databases of patterns and prints the
+    bytes they map against the mean nodes expanded and solving time.
+    """
+    random.seed(seed)
+    puzzles = [fifteenpuzzle.createRandomFifteenPuzzle(moves) for _ in range(count)]
+    storages = [('full', 1)] + [('min', factor) for factor in factors] + [('mod3', 1)]
+    print(f"{'storage':>8} {'bytes':>10} {'nodes expanded':>15} {'seconds':>8}")
+    for storage, factor in storages:
+        heuristic = patterndb.patternDatabaseHeuristic(patterns, directory, True, storage, factor)
+        size = sum(patterndb.storageSize(len(pattern), storage, factor) for pattern in patterns)
+        nodes = seconds = 0
+        for puzzle in puzzles:
+            started = time.perf_counter()
+            result = search.aStarSearch(fifteenpuzzle.FifteenPuzzleSearchProblem(puzzle), heuristic)
+            seconds += time.perf_counter() - started
+            nodes += result.nodes_expanded
+        name = storage + (str(factor) if storage == 'min' else '')
+        print(f"{name:>8} {size:>10} {nodes / count:>15.0f} {seconds / count:>8.2f}")
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Build additive pattern databases for the fifteen-puzzle.")
+    parser.add_argument('patterns', nargs='*', default=[patterndb.DEFAULT_PARTITION],
+                        help="partition names (" + ", ".join(patterndb.PARTITIONS) + ") or comma-separated tiles")
+    parser.add_argument('--directory', default=patterndb.DEFAULT_DIRECTORY)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--shard-size', type=int, default=1 << 15, help="placements expanded per task")
+    parser.add_argument('--storage', choices=patterndb.STORAGES, default='full',
+                        help="also write a compressed copy of every database")
+    parser.add_argument('--factor', type=int, default=2, help="entries folded into one by --storage min")
+    parser.add_argument('--verify', action='store_true', help="only check finished databases against their checksums")
+    parser.add_argument('--measure', type=int, metavar='COUNT',
+                        help="compare nodes expanded by A* on COUNT random puzzles under every storage")
+    parser.add_argument('--quiet', action='store_true')
+    options = parser.parse_args(arguments)
+
+    patterns = parsePatterns(options.patterns)
+    if options.measure:
+        measureStorage(patterns, options.directory, options.measure)
+        return 0
+    failures = 0
+    for pattern in patterns:
+        if options.verify:
+            valid = patterndb.verifyPatternDatabase(pattern, options.directory)
+            failures += not valid
+            print(f"{patterndb.databasePath(pattern, options.directory)}: {'ok' if valid else 'FAILED'}")
+            continue
+        started = time.perf_counter()
+        path = patterndb.buildPatternDatabase(pattern, options.directory, options.workers, options.shard_size,
+                                              not options.quiet)
+        print(f"{path}: {time.perf_counter() - started:.1f} s")
+        if options.storage != 'full':
+            print(patterndb.compressPatternDatabase(pattern, options.directory, options.storage, options.factor))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
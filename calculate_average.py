@@ -7,8 +7,9 @@ df = pd.read_csv(file_path)
 # Clean column names by stripping spaces
 df.columns = df.columns.str.strip()
 
-# Filter for valid search methods (dfs, bfs, ucs) and exclude rows where the result is "ERROR"
-df_filtered = df[(df['Search Method'].isin(['depthFirstSearch', 'breadthFirstSearch', 'uniformCostSearch'])) & (df['Solution State'] != 'ERROR')]
+# Filter for valid search methods (dfs, ids, bfs, bidirectional bfs, ucs) and exclude rows where the result is "ERROR"
+df_filtered = df[(df['Search Method'].isin(['depthFirstSearch', 'iterativeDeepeningSearch', 'breadthFirstSearch',
+                                               'bidirectionalBreadthFirstSearch', 'uniformCostSearch'])) & (df['Solution State'] != 'ERROR')]
 
 # Convert columns to numeric, coercing errors to NaN
 df_filtered['Solution Depth'] = pd.to_numeric(df_filtered['Solution Depth'], errors='coerce')
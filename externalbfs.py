@@ -0,0 +1,194 @@
+# externalbfs.py
+# --------------
+# Breadth-first enumeration of the fifteen-puzzle state space on disk.
+#
+# Every layer is a binary file of packed boards (see packedboard) stored as
+# native unsigned 64-bit ints in ascending order.  The puzzle graph is
+# bipartite, so a board generated from layer d either is new or lies in layer
+# d - 1, or was generated twice for layer d + 1.  Successors are therefore
+# written out as sorted runs of bounded size, and the runs are merged with
+# each other and against the two previous layers to drop duplicates.  Only
+# one run is held in memory at a time.
+#
+# A manifest written after every layer records the start board and the
+# per-depth counts, so an interrupted enumeration resumes from the last
+# completed layer.
+
+import array
+import csv
+import glob
+import heapq
+import json
+import os
+
+import packedboard
+import util
+
+MANIFEST = 'manifest.json'
+COUNTS = 'counts.csv'
+READ_CHUNK = 1 << 16  # Boards read from or written to a file at a time
+
+
+def layerPath(directory, depth):
+    """
+    Returns the path of the file holding the boards at the given depth.
+    """
+    return os.path.join(directory, f'layer-{depth:03d}.bin')
+
+
+def readBoards(path):
+    """
+    Yields the packed boards stored in a layer or run file, in file order.
+    """
+    with open(path, 'rb') as file:
+        while True:
+            chunk = array.array('Q')
+            try:
+                chunk.fromfile(file, READ_CHUNK)
+            except EOFError:  # The last, partial chunk is still read
+                yield from chunk
+                return
+            yield from chunk
+
+
+def writeBoards(path, boards):
+    """
+    Writes an iterable of packed boards to path and returns their number.
+    The file is written through util.atomicWrite, so a file under its final
+    name is never partial.
+    """
+    count = 0
+    chunk = array.array('Q')
+    with util.atomicWrite(path) as file:
+        for board in boards:
+            chunk.append(board)
+            if len(chunk) == READ_CHUNK:
+                chunk.tofile(file)
+                count += len(chunk)
+                chunk = array.array('Q')
+        chunk.tofile(file)
+        count += len(chunk)
+    return count
+
+
+def _unique(boards):
+    """
+    Drops repeated boards from a sorted stream.
+    """
+    previous = None
+    for board in boards:
+        if board != previous:
+            yield board
+            previous = board
+
+
+def _difference(boards, excluded):
+    """
+    Yields the boards of a sorted stream that do not appear in the sorted
+    stream excluded.
+    """
+    excluded = iter(excluded)
+    current = next(excluded, None)
+    for board in boards:
+        while current is not None and current < board:
+            current = next(excluded, None)
+        if board != current:
+            yield board
+
+
+def _expandLayer(directory, depth, runSize):
+    """
+    Generates the layer at depth + 1 from the one at depth and returns its
+    number of boards.
+    """
+    neighbours = packedboard.NEIGHBOURS
+    runs, run = [], []
+
+    def flush():
+        path = os.path.join(directory, f'run-{depth + 1:03d}-{len(runs):05d}.bin')
+        writeBoards(path, sorted(set(run)))
+        runs.append(path)
+
+    for board in readBoards(layerPath(directory, depth)):
+        blank = packedboard.findBlank(board)
+        for _, targetShift, blankShift, _, _ in neighbours[blank]:
+            tile = (board >> targetShift) & 0xF
+            run.append(board - (tile << targetShift) + (tile << blankShift))
+        if len(run) >= runSize:
+            flush()
+            run = []
+    if run:
+        flush()
+
+    generated = _unique(heapq.merge(*(readBoards(path) for path in runs)))
+    previous = heapq.merge(*(readBoards(layerPath(directory, d)) for d in (depth, depth - 1) if d >= 0))
+    count = writeBoards(layerPath(directory, depth + 1), _difference(generated, previous))
+    for path in runs:
+        os.remove(path)
+    return count
+
+
+def _loadManifest(directory, startBoard):
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return {'start': startBoard, 'counts': [], 'complete': False}
+    with open(path) as file:
+        manifest = json.load(file)
+    if manifest['start'] != startBoard:
+        raise ValueError(f"{directory} holds an enumeration from another start board.")
+    return manifest
+
+
+def _saveManifest(directory, manifest):
+    path = os.path.join(directory, MANIFEST)
+    with util.atomicWrite(path, 'w') as file:
+        json.dump(manifest, file)
+    with open(os.path.join(directory, COUNTS), 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['Depth', 'Count'])
+        writer.writerows(enumerate(manifest['counts']))
+
+
+def externalBreadthFirstSearch(directory, start=None, maxDepth=None, runSize=1 << 22, verbose=True):
+    """
+    Enumerates the states reachable from start (a fifteen_Puzzle_State,
+    the goal by default) layer by layer into directory, stopping after
+    maxDepth layers or when the state space is exhausted.  At most runSize
+    successors are held in memory at once.  Each layer is recorded in the
+    manifest once its file is complete, and a later call on the same
+    directory resumes after the last recorded layer.
+
+    Returns the list of the number of states at each depth, which is also
+    written to counts.csv in directory.
+    """
+    startBoard = packedboard.GOAL_BOARD if start is None else start.board
+    os.makedirs(directory, exist_ok=True)
+    manifest = _loadManifest(directory, startBoard)
+    counts = manifest['counts']
+
+    # Leftovers of an interrupted layer
+    for path in glob.glob(os.path.join(directory, 'run-*.bin')) + glob.glob(os.path.join(directory, '*.tmp')):
+        os.remove(path)
+
+    if not counts:
+        counts.append(writeBoards(layerPath(directory, 0), [startBoard]))
+        _saveManifest(directory, manifest)
+    while not manifest['complete'] and (maxDepth is None or len(counts) <= maxDepth):
+        depth = len(counts) - 1
+        count = _expandLayer(directory, depth, runSize)
+        if count:
+            counts.append(count)
+        else:
+            os.remove(layerPath(directory, depth + 1))
+            manifest['complete'] = True
+        _saveManifest(directory, manifest)
+        if verbose and count:
+            print(f"External BFS: depth {depth + 1}, {count} states")
+    return counts
+
+
+if __name__ == "__main__":
+    import sys
+
+    externalBreadthFirstSearch(sys.argv[1] if len(sys.argv) > 1 else 'bfs_layers',
+                               maxDepth=int(sys.argv[2]) if len(sys.argv) > 2 else None)
@@ -12,6 +12,8 @@
 # Pieter Abbeel (pabbeel@cs.berkeley.edu).
 import random
 
+import movepruning
+import packedboard
 import search
 import util
 
@@ -19,25 +21,57 @@ import util
 # Module Classes
 # /=====Start Change Task i=====/------------------------------------------------------------------------------------
 class fifteen_Puzzle_State:
+    """
+    A 15-puzzle board.  The tiles are kept packed as nibbles of a single int
+    (see packedboard.py) together with the index of the blank cell, so
+    hashing, equality, the goal test and moves are plain integer operations.
+    The nested-list view used by callers is still available as 'cells'.
+    """
+
+    __slots__ = ('board', 'blank')
 
     def __init__(self, numbers):
         # Ensure the input contains 16 elements
         if len(numbers) != 16:
             raise ValueError("The puzzle must contain exactly 16 elements.")
 
-        self.cells = []
-        self.blankLocation = None  # This will store the position of the blank (0) tile
+        if 0 not in numbers:
+            raise ValueError("Puzzle must contain a blank tile represented by 0.")
 
-        for row in range(4):
-            self.cells.append([])
-            for col in range(4):
-                value = numbers.pop(0)  # Get the next tile value
-                self.cells[row].append(value)
-                if value == 0:
-                    self.blankLocation = (row, col)  # Store the blank's position
+        self.board = packedboard.pack(numbers)
+        self.blank = list(numbers).index(0)  # Index (0-15) of the blank tile
 
-        if self.blankLocation is None:
-            raise ValueError("Puzzle must contain a blank tile represented by 0.")
+    @classmethod
+    def fromPacked(cls, board, blank):
+        """
+        Builds a state directly from a packed board and its blank index,
+        skipping the validation done by __init__.
+        """
+        state = cls.__new__(cls)
+        state.board = board
+        state.blank = blank
+        return state
+
+    @property
+    def cells(self):
+        """
+        The board as a list of four rows of four tiles.
+        """
+        tiles = packedboard.unpack(self.board)
+        return [tiles[row * 4:row * 4 + 4] for row in range(4)]
+
+    @cells.setter
+    def cells(self, rows):
+        tiles = sum(rows, [])
+        self.board = packedboard.pack(tiles)
+        self.blank = tiles.index(0)
+
+    @property
+    def blankLocation(self):
+        """
+        The (row, col) position of the blank tile.
+        """
+        return divmod(self.blank, 4)
 
     # /=====End Change# Task i =====/
 
@@ -47,27 +81,17 @@ class fifteen_Puzzle_State:
         """
         Checks if the puzzle is in the goal state.
         """
-        goal = list(range(1, 16)) + [0]  # The goal state (flattened)
-        flat_cells = sum(self.cells, [])  # Flatten the 2D grid into a 1D list
-        return flat_cells == goal
+        return self.board == packedboard.GOAL_BOARD
 
     # /=====End Change Task i=====/----------------------------------------------------------------------------------
 
     # /=====start Change Task i=====/--------------------------------------------------------------------------------
     def legalMoves(self):
-        row, col = self.blankLocation  # Get the current position of the blank tile
-        moves = []
-
-        if row > 0:  # Can move the blank up
-            moves.append('up')
-        if row < 3:  # Can move the blank down
-            moves.append('down')
-        if col > 0:  # Can move the blank left
-            moves.append('left')
-        if col < 3:  # Can move the blank right
-            moves.append('right')
-
-        return moves # Return the list of valid moves based on the blank tile's position
+        """
+        Returns the moves of the blank that stay on the board.  The tuple comes
+        from a table built once at import, so no list is allocated per call.
+        """
+        return packedboard.LEGAL_MOVES[self.blank]
 
     # /=====End Change Task i=====/--------------------------------------------------------------------------------
 
@@ -76,29 +100,13 @@ class fifteen_Puzzle_State:
         """
         Applies the given move ('up', 'down', 'left', 'right') and returns the new state.
         """
-        row, col = self.blankLocation
-
-        if move == 'up':
-            new_row, new_col = row - 1, col
-        elif move == 'down':
-            new_row, new_col = row + 1, col
-        elif move == 'left':
-            new_row, new_col = row, col - 1
-        elif move == 'right':
-            new_row, new_col = row, col + 1
-        else:
+        try:
+            target = packedboard.MOVE_TARGETS[self.blank][move]
+        except KeyError:
             raise ValueError(f"Illegal move: {move}")
 
-        # Create a new puzzle state and update it with the move
-        new_puzzle = fifteen_Puzzle_State([0] * 16)
-        new_puzzle.cells = [row.copy() for row in self.cells]  # Use a faster copying method
-        new_puzzle.cells[row][col], new_puzzle.cells[new_row][new_col] = (
-            new_puzzle.cells[new_row][new_col],
-            new_puzzle.cells[row][col],
-        )
-        new_puzzle.blankLocation = (new_row, new_col)
-
-        return new_puzzle
+        # Slide the neighbouring tile into the blank cell of the packed board
+        return fifteen_Puzzle_State.fromPacked(packedboard.slide(self.board, self.blank, target), target)
 
     # /=====End Change Task i=====/--------------------------------------------------------------------------------
 
@@ -107,11 +115,11 @@ class fifteen_Puzzle_State:
     # /=====start Change Task i=====/--------------------------------------------------------------------------------
     def __eq__(self, other):
         if isinstance(other, fifteen_Puzzle_State):
-            return self.cells == other.cells
+            return self.board == other.board
         return False
 
     def __hash__(self):
-        return hash(tuple(map(tuple, self.cells)))
+        return hash(self.board)
 
     def __getAsciiString(self):
         """
@@ -142,13 +150,81 @@ class fifteen_Puzzle_State:
     def __lt__(self, other):
         """
         Compares two puzzle states for priority queue.
-        We use tuple representation of the state for faster comparison.
+        Packed boards order the same way as their row-major tile lists.
         """
-        return tuple(map(tuple, self.cells)) < tuple(map(tuple, other.cells))
+        return self.board < other.board
+
+    def cursor(self, heuristicTable=None):
+        """
+        Returns a mutable FifteenPuzzleCursor positioned on this state.
+        """
+        return FifteenPuzzleCursor(self, heuristicTable)
 
 
 # /=====End Change Task i=====/--------------------------------------------------------------------------------------
 
+class FifteenPuzzleCursor:
+    """
+    A single mutable board for depth-first style searches.  apply(move) and
+    undo(move) slide one tile in place, keeping the blank index, the packed
+    board (which doubles as the hash key) and, when a per-tile heuristic table
+    is given, the heuristic value in sync, so walking a search tree allocates
+    no new states.
+
+    Moves are the integer codes of packedboard.MOVE_NAMES.  heuristicTable,
+    if given, is indexed as heuristicTable[tile][cell] and the heuristic is
+    the sum of the entries of all non-blank tiles.
+    """
+
+    __slots__ = ('tiles', 'board', 'blank', 'heuristicTable', 'h')
+
+    def __init__(self, state, heuristicTable=None):
+        self.tiles = packedboard.unpack(state.board)
+        self.board = state.board
+        self.blank = state.blank
+        self.heuristicTable = heuristicTable
+        self.h = 0
+        if heuristicTable is not None:
+            self.h = sum(heuristicTable[tile][index] for index, tile in enumerate(self.tiles) if tile)
+
+    def moves(self):
+        """
+        Returns the (target, targetShift, blankShift, name, code) entries of
+        packedboard.NEIGHBOURS for the current blank position.
+        """
+        return packedboard.NEIGHBOURS[self.blank]
+
+    def apply(self, move):
+        """
+        Moves the blank by the given move code.  The move must be legal.
+        """
+        blank = self.blank
+        target = blank + packedboard.MOVE_STEP[move]
+        tiles = self.tiles
+        tile = tiles[target]
+        tiles[blank] = tile
+        tiles[target] = 0
+        self.board += (tile << packedboard.SHIFT[blank]) - (tile << packedboard.SHIFT[target])
+        if self.heuristicTable is not None:
+            self.h += self.heuristicTable[tile][blank] - self.heuristicTable[tile][target]
+        self.blank = target
+
+    def undo(self, move):
+        """
+        Reverts a previous apply(move).
+        """
+        self.apply(packedboard.INVERSE_MOVE[move])
+
+    def isGoal(self):
+        return self.board == packedboard.GOAL_BOARD
+
+    def state(self):
+        """
+        Returns an immutable fifteen_Puzzle_State snapshot of the cursor.
+        """
+        return fifteen_Puzzle_State.fromPacked(self.board, self.blank)
+
+
 # TODO: Implement The methods in this class
 # /=====Start Change Task i=====/--------------------------------------------------------------------------------
 class FifteenPuzzleSearchProblem(search.SearchProblem):
@@ -183,14 +259,80 @@ class FifteenPuzzleSearchProblem(search.SearchProblem):
         Returns a list of (successor, action, stepCost) tuples.
         Each successor is the result of a valid move from the current state.
         """
+        board = state.board
+        fromPacked = fifteen_Puzzle_State.fromPacked
         successors = []
 
-        for move in state.legalMoves():
-            new_state = state.result(move)
+        # Walk the precomputed neighbour table of the blank position
+        for target, targetShift, blankShift, move, _ in packedboard.NEIGHBOURS[state.blank]:
+            tile = (board >> targetShift) & 0xF
+            new_state = fromPacked(board - (tile << targetShift) + (tile << blankShift), target)
             successors.append((new_state, move, 1))  # The step cost is 1 for every move
 
         return successors
 
+    def getGoalState(self):
+        """
+        Returns the goal puzzle state.
+        """
+        return fifteen_Puzzle_State.fromPacked(packedboard.GOAL_BOARD, packedboard.GOAL_BLANK)
+
+    def getPredecessors(self, state):
+        """
+        Returns a list of (predecessor, action, stepCost) tuples, where applying
+        'action' to 'predecessor' leads to the given state.  Every blank move is
+        undone by the opposite move, so the predecessors are the successors
+        labelled with the inverse action.
+        """
+        board = state.board
+        fromPacked = fifteen_Puzzle_State.fromPacked
+        moveNames, inverse = packedboard.MOVE_NAMES, packedboard.INVERSE_MOVE
+        predecessors = []
+
+        for target, targetShift, blankShift, _, code in packedboard.NEIGHBOURS[state.blank]:
+            tile = (board >> targetShift) & 0xF
+            previous_state = fromPacked(board - (tile << targetShift) + (tile << blankShift), target)
+            predecessors.append((previous_state, moveNames[inverse[code]], 1))
+
+        return predecessors
+
+    def getHeuristicSuccessors(self, state, heuristicValue, heuristicTable):
+        """
+        Like getSuccessors, but returns (successor, action, stepCost, heuristic)
+        tuples for a heuristic that sums per-tile terms heuristicTable[tile][cell]
+        (see getPrunedSuccessors).
+        """
+        return [(new_state, move, cost, heuristic) for new_state, move, cost, heuristic, _
+                in self.getPrunedSuccessors(state, movepruning.START, movepruning.machine(0),
+                                            heuristicValue, heuristicTable)]
+
+    def getPrunedSuccessors(self, state, machineState, transitions, heuristicValue=0, heuristicTable=None):
+        """
+        Like getSuccessors, but skips the moves that a movepruning machine,
+        given as its transitions table, prunes after a path in machineState.
+        Returns (successor, action, stepCost, heuristic, nextMachineState)
+        tuples.  heuristic is None unless heuristicTable is given for a
+        heuristic that sums per-tile terms heuristicTable[tile][cell]: a move
+        changes the cell of exactly one tile, so each successor's value is
+        the parent's heuristicValue plus that tile's delta.
+        """
+        board, blank = state.board, state.blank
+        fromPacked = fifteen_Puzzle_State.fromPacked
+        row = transitions[machineState]
+        successors = []
+
+        for target, targetShift, blankShift, move, code in packedboard.NEIGHBOURS[blank]:
+            if row[code] < 0:
+                continue
+            tile = (board >> targetShift) & 0xF
+            new_state = fromPacked(board - (tile << targetShift) + (tile << blankShift), target)
+            heuristic = None
+            if heuristicTable is not None:
+                heuristic = heuristicValue + heuristicTable[tile][blank] - heuristicTable[tile][target]
+            successors.append((new_state, move, 1, heuristic, row[code]))
+
+        return successors
+
     def getCostOfActions(self, actions):
         """
          actions: A list of actions to take
@@ -0,0 +1,123 @@
+# movepruning.py
+# --------------
+# Duplicate-operator pruning for blank moves of a 4x4 sliding-tile board.
+#
+# Two move sequences are duplicates when they rearrange the tiles in the same
+# way wherever they can be applied, as the moves 'left, right' and the empty
+# sequence do, or the two ways of walking the blank half-way around a 2x2
+# block in opposite directions.  A sequence can be applied from a cell exactly
+# when the bounding box of the blank's walk fits on the board, so a sequence A
+# can be replaced by a duplicate B whose box lies inside A's box.  Among the
+# sequences of each such class only the least one, ordered by length and then
+# by move codes, has to be searched.  Every other one contains a minimal
+# duplicate sequence and can be pruned without losing any state or any
+# shortest path to it.
+#
+# The minimal duplicate sequences up to a given length are found by
+# enumerating the walks of the blank.  They are compiled into an Aho-Corasick
+# automaton over the move codes of packedboard, so a depth-first search only
+# carries one small int per node: the machine state reached by the moves on
+# its path.
+
+import packedboard
+
+MAX_LENGTH = 8  # Length of the longest duplicate sequences recognised by default
+START = 0  # Machine state of the empty move sequence
+PRUNED = -1  # Transition taken by a move that must not be tried
+
+
+def duplicateSequences(maxLength, size=packedboard.SIZE):
+    """
+    Returns the minimal duplicate move sequences of at most maxLength moves,
+    as tuples of move codes.  A sequence is listed when an earlier sequence in
+    (length, move codes) order has the same effect on the tiles and a
+    bounding box inside its own, and none of its proper subsequences of
+    consecutive moves is listed.  Sequences whose walk does not fit on a
+    size x size board never apply and are left out.
+    """
+    inverse = packedboard.INVERSE_MOVE
+    steps = packedboard.MOVE_OFFSETS
+    duplicates = set()
+    # Effect -> bounding boxes of the sequences kept with that effect.  The effect is
+    # the blank's final cell and the source cell of every tile that moved, relative
+    # to the blank's starting cell.
+    boxes = {((0, 0), ()): [(0, 0, 0, 0)]}
+    # Sequences with no duplicate inside, with their blank, moved tiles and box
+    layer = [((), (0, 0), {}, (0, 0, 0, 0))]
+    for _ in range(maxLength):
+        nextLayer = []
+        for moves, (row, col), sources, (top, bottom, left, right) in layer:
+            for code, (dRow, dCol) in enumerate(steps):
+                sequence = moves + (code,)
+                if moves and code == inverse[moves[-1]]:
+                    duplicates.add(sequence[-2:])
+                    continue
+                if any(sequence[start:] in duplicates for start in range(1, len(sequence) - 1)):
+                    continue
+                blank = (row + dRow, col + dCol)
+                box = (min(top, blank[0]), max(bottom, blank[0]), min(left, blank[1]), max(right, blank[1]))
+                if box[1] - box[0] >= size or box[3] - box[2] >= size:
+                    continue
+
+                # The tile on the blank's new cell slides into its old one
+                moved = dict(sources)
+                moved[(row, col)] = moved.pop(blank, blank)
+                effect = (blank, tuple(sorted((cell, source) for cell, source in moved.items() if cell != source)))
+                kept = boxes.setdefault(effect, [])
+                if any(box[0] <= other[0] and other[1] <= box[1] and box[2] <= other[2] and other[3] <= box[3]
+                       for other in kept):
+                    duplicates.add(sequence)
+                    continue
+                kept.append(box)
+                nextLayer.append((sequence, blank, moved, box))
+        layer = nextLayer
+    return sorted(duplicates, key=lambda sequence: (len(sequence), sequence))
+
+
+def buildMachine(sequences, moveCount=len(packedboard.MOVE_NAMES)):
+    """
+    Compiles move sequences into an Aho-Corasick automaton.  Returns the
+    transition table: machine[state][code] is the state reached by appending
+    the move code to a path in the given state, or PRUNED if the path would
+    then end with one of the sequences.  The empty path is in state START.
+    """
+    # Trie of the sequences; node 0 is the root
+    children = [{}]
+    terminal = [False]
+    for sequence in sequences:
+        node = 0
+        for code in sequence:
+            if code not in children[node]:
+                children[node][code] = len(children)
+                children.append({})
+                terminal.append(False)
+            node = children[node][code]
+        terminal[node] = True
+
+    # Breadth-first over the trie, completing every node's transitions through its
+    # failure link (the longest proper suffix of its path that is also in the trie)
+    transitions = [None] * len(children)
+    transitions[0] = [children[0].get(code, 0) for code in range(moveCount)]
+    queue = [(child, 0) for child in children[0].values()]
+    for node, failure in queue:
+        terminal[node] = terminal[node] or terminal[failure]
+        transitions[node] = [children[node].get(code, transitions[failure][code]) for code in range(moveCount)]
+        queue.extend((child, transitions[failure][code]) for code, child in children[node].items())
+
+    # Nodes that end a sequence are never entered, and no transition leaves them
+    return tuple(tuple(PRUNED if terminal[target] else target for target in row) for row in transitions)
+
+
+_MACHINES = {}
+
+
+def machine(maxLength=MAX_LENGTH):
+    """
+    Returns the transition table of the automaton that prunes every duplicate
+    move sequence of at most maxLength moves, building it on first use.
+    maxLength 2 only prunes the move undoing the previous one, and 0
+    prunes nothing.
+    """
+    if maxLength not in _MACHINES:
+        _MACHINES[maxLength] = buildMachine(duplicateSequences(maxLength))
+    return _MACHINES[maxLength]
@@ -0,0 +1,97 @@
+# packedboard.py
+# --------------
+# Packed integer encoding of a 4x4 sliding-tile board.
+#
+# The sixteen cells are stored as 4-bit nibbles of a single int with cell 0
+# (top-left) in the most significant nibble and cell 15 (bottom-right) in the
+# least significant one.  Because of that ordering, comparing two packed boards
+# gives the same answer as comparing their row-major tile lists, and equality,
+# hashing and the goal test are single integer operations.
+
+SIZE = 4
+CELLS = SIZE * SIZE
+
+# Bit offset of every cell's nibble inside a packed board
+SHIFT = tuple((CELLS - 1 - index) * 4 for index in range(CELLS))
+
+GOAL_TILES = tuple(range(1, CELLS)) + (0,)
+
+
+def pack(tiles):
+    """
+    Packs a row-major sequence of 16 tile values into a single int.
+    """
+    board = 0
+    for tile in tiles:
+        board = (board << 4) | tile
+    return board
+
+
+def unpack(board):
+    """
+    Returns the row-major list of 16 tile values stored in a packed board.
+    """
+    return [(board >> shift) & 0xF for shift in SHIFT]
+
+
+def tileAt(board, index):
+    """
+    Returns the tile stored at the given cell index (0-15) of a packed board.
+    """
+    return (board >> SHIFT[index]) & 0xF
+
+
+def findBlank(board):
+    """
+    Returns the cell index of the blank (0) tile of a packed board.
+    """
+    for index, shift in enumerate(SHIFT):
+        if not (board >> shift) & 0xF:
+            return index
+    raise ValueError("Board does not contain a blank tile.")
+
+
+def slide(board, blank, target):
+    """
+    Moves the tile at cell 'target' into the blank cell and returns the new
+    packed board.  The blank nibble is always zero, so the swap is just two
+    additions.
+    """
+    tile = (board >> SHIFT[target]) & 0xF
+    return board - (tile << SHIFT[target]) + (tile << SHIFT[blank])
+
+
+GOAL_BOARD = pack(GOAL_TILES)
+GOAL_BLANK = CELLS - 1
+
+# Blank moves, in the order legalMoves() has always reported them
+MOVE_NAMES = ('up', 'down', 'left', 'right')
+MOVE_OFFSETS = ((-1, 0), (1, 0), (0, -1), (0, 1))  # (row, col) step of the blank
+INVERSE_MOVE = (1, 0, 3, 2)  # Move code that undoes each move code
+MOVE_STEP = (-SIZE, SIZE, -1, 1)  # Change of the blank's cell index for each move code
+
+
+def _buildMoveTables():
+    """
+    Computes, once at import, the legal blank moves for each of the 16 blank
+    positions.  NEIGHBOURS[blank] lists (target, targetShift, blankShift, name,
+    code) entries: the cell the blank moves to, the nibble offsets of both
+    cells and the move's label and code.
+    """
+    neighbours, legalMoves, targets = [], [], []
+    for blank in range(CELLS):
+        row, col = divmod(blank, SIZE)
+        entries, byName = [], {}
+        for code, (name, (dRow, dCol)) in enumerate(zip(MOVE_NAMES, MOVE_OFFSETS)):
+            newRow, newCol = row + dRow, col + dCol
+            if 0 <= newRow < SIZE and 0 <= newCol < SIZE:
+                target = newRow * SIZE + newCol
+                entries.append((target, SHIFT[target], SHIFT[blank], name, code))
+                byName[name] = target
+        neighbours.append(tuple(entries))
+        legalMoves.append(tuple(entry[3] for entry in entries))
+        targets.append(byName)
+    return tuple(neighbours), tuple(legalMoves), tuple(targets)
+
+
+NEIGHBOURS, LEGAL_MOVES, MOVE_TARGETS = _buildMoveTables()
@@ -0,0 +1,407 @@
+# parallelsearch.py
+# -----------------
+# Multi-process searches for the fifteen puzzle.
+#
+# Worker processes share nothing but queues and a few counters.  Nodes travel
+# between them as plain tuples of a packed board (see packedboard), the blank
+# cell, the path cost, the heuristic value and the path itself, encoded as an
+# int holding two bits per move code (the first move in the highest bits).
+
+import heapq
+import math
+import multiprocessing
+import os
+import queue
+
+import packedboard
+import search
+import util
+from fifteenpuzzle import fifteen_Puzzle_State
+
+
+def decodePath(path, length):
+    """
+    Returns the move names of a path encoded two bits per move code.
+    """
+    return [packedboard.MOVE_NAMES[(path >> (2 * index)) & 3] for index in range(length - 1, -1, -1)]
+
+
+def _owner(board, workers):
+    """
+    Returns the rank of the worker that owns a packed board.  Neighbouring
+    boards differ in two nibbles only, so the board is mixed by a
+    multiplicative hash before taking it modulo the number of workers.
+    """
+    return (((board * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> 32) % workers
+
+
+def _childEvaluator(heuristic, problem):
+    """
+    Returns a function (board, blank, h, tile, target, child) -> h of the
+    child board reached by sliding 'tile' from 'target' into 'blank'.
+    Heuristics with a per-tile table are updated by the tile's delta; any
+    other heuristic is evaluated on a fresh state.
+    """
+    table = search.HEURISTIC_TABLES.get(heuristic)
+    if table is not None:
+        return lambda board, blank, h, tile, target, child: h + table[tile][blank] - table[tile][target]
+    fromPacked = fifteen_Puzzle_State.fromPacked
+    return lambda board, blank, h, tile, target, child: heuristic(fromPacked(child, target), problem)
+
+
+def _hdaWorker(rank, inboxes, results, status, frontier, bound, heuristic, problem, batchSize):
+    """
+    Body of one hdaStarSearch worker.  The worker runs A* over the boards it
+    owns and forwards every other generated node to its owner in batches.
+    status holds (idle, batches sent, batches received) for each worker and
+    its lock guards every update.  frontier holds the least f of every
+    worker's open list: a worker only expands nodes up to the global least f,
+    so that the workers advance through the f-layers together instead of one
+    of them running ahead.  bound holds the cost of the best solution found
+    so far, which prunes every node whose f is not below it.
+    """
+    workers = len(inboxes)
+    inbox = inboxes[rank]
+    childHeuristic = _childEvaluator(heuristic, problem)
+    neighbours, inverse = packedboard.NEIGHBOURS, packedboard.INVERSE_MOVE
+    openList = []  # (f, -g, board, blank, g, h, path): least f first, deepest among ties
+    bestCost = {}  # board -> lowest g this worker has received
+    outgoing = [[] for _ in range(workers)]
+    nodes_expanded = 0
+    max_fringe_size = 0
+
+    def send(destination):
+        batch = outgoing[destination]
+        outgoing[destination] = []
+        with status.get_lock():
+            status[3 * rank + 1] += 1
+        inboxes[destination].put(batch)
+
+    def receive(batch, limit):
+        for board, blank, g, h, path in batch:
+            if g + h < limit and g < bestCost.get(board, math.inf):
+                bestCost[board] = g
+                heapq.heappush(openList, (g + h, -g, board, blank, g, h, path))
+
+    layer = -math.inf  # Global least f, as last read from frontier
+    while True:
+        # Take in every batch already waiting, blocking for a while when out of work
+        waiting = not openList or openList[0][0] > layer
+        while True:
+            try:
+                batch = inbox.get(timeout=0.05) if waiting else inbox.get_nowait()
+            except queue.Empty:
+                break
+            if batch is None:
+                results.put(('stats', rank, nodes_expanded, max_fringe_size))
+                return
+            with status.get_lock():
+                status[3 * rank] = 0
+                status[3 * rank + 2] += 1
+            receive(batch, bound.value)
+            waiting = False
+
+        limit = bound.value
+        frontier[rank] = openList[0][0] if openList else math.inf
+        layer = min(frontier)
+        for _ in range(batchSize):
+            if not openList or openList[0][0] > layer:
+                break
+            f, _, board, blank, g, h, path = heapq.heappop(openList)
+            if g > bestCost[board]:
+                continue  # A cheaper copy of this board was received later
+            if f >= limit:
+                openList.clear()  # Nothing left here can beat the incumbent
+                break
+
+            nodes_expanded += 1
+            if board == packedboard.GOAL_BOARD:
+                with bound.get_lock():
+                    if g < bound.value:
+                        bound.value = g
+                        results.put(('solution', g, path))
+                limit = bound.value
+                continue
+
+            for target, targetShift, blankShift, _, code in neighbours[blank]:
+                if g and code == inverse[path & 3]:  # Parent-move pruning
+                    continue
+                tile = (board >> targetShift) & 0xF
+                child = board - (tile << targetShift) + (tile << blankShift)
+                node = (child, target, g + 1, childHeuristic(board, blank, h, tile, target, child), (path << 2) | code)
+                destination = _owner(child, workers)
+                if destination == rank:
+                    receive((node,), limit)
+                else:
+                    outgoing[destination].append(node)
+                    if len(outgoing[destination]) >= batchSize:
+                        send(destination)
+        max_fringe_size = max(max_fringe_size, len(openList))
+
+        frontier[rank] = openList[0][0] if openList else math.inf
+        if not openList or openList[0][0] > layer:
+            for destination in range(workers):
+                if outgoing[destination]:
+                    send(destination)
+        if not openList:
+            with status.get_lock():
+                status[3 * rank] = 1
+
+
+def hdaStarSearch(problem, heuristic, workers=None, batchSize=64, verbose=True):
+    """
+    Hash-distributed A* (HDA*) over a pool of worker processes.  Every board
+    is owned by the worker chosen by hashing it, and only its owner keeps it
+    in an open list and a table of best costs, so duplicate detection needs
+    no shared memory.  Generated nodes are sent to their owners in batches of
+    batchSize.  A worker reaching the goal lowers the shared solution bound,
+    and the search stops once every worker has run out of nodes below the
+    bound and no batch is still in flight, which keeps the result optimal
+    for an admissible heuristic.  Moves are assumed to cost 1.
+
+    Returns the same util.SearchStats as aStarSearch, with the nodes
+    expanded and fringe sizes summed over the workers and the expansions of
+    every worker in stats.worker_expansions, to measure the load balance.
+    With verbose set, they are printed too.
+    """
+    stats = util.SearchStats()
+    workers = workers or os.cpu_count() or 1
+    context = multiprocessing.get_context()
+    inboxes = [context.Queue() for _ in range(workers)]
+    results = context.Queue()
+    status = context.Array('q', 3 * workers)  # (idle, sent, received) per worker
+    frontier = context.Array('d', [-math.inf] * workers)  # Least open f per worker
+    bound = context.Value('d', math.inf)
+
+    start = problem.getStartState()
+    startNode = (start.board, start.blank, 0, heuristic(start, problem), 0)
+    status[1] += 1  # Counted as a batch sent by worker 0
+    inboxes[_owner(start.board, workers)].put([startNode])
+
+    processes = [context.Process(target=_hdaWorker,
+                                 args=(rank, inboxes, results, status, frontier, bound, heuristic, problem, batchSize),
+                                 daemon=True)
+                 for rank in range(workers)]
+    for process in processes:
+        process.start()
+
+    solution = None
+    while True:
+        try:
+            message = results.get(timeout=0.05)
+        except queue.Empty:
+            message = None
+        if message is not None and (solution is None or message[1] < solution[1]):
+            solution = message
+        with status.get_lock():
+            snapshot = status[:]
+        if all(snapshot[0::3]) and sum(snapshot[1::3]) == sum(snapshot[2::3]):
+            break
+
+    for inbox in inboxes:
+        inbox.put(None)
+    expansions = [0] * workers
+    max_fringe_size = 0
+    for _ in range(workers):
+        message = results.get()
+        while message[0] != 'stats':  # A solution that arrived after the last check
+            if solution is None or message[1] < solution[1]:
+                solution = message
+            message = results.get()
+        _, rank, expanded, fringe = message
+        expansions[rank] = expanded
+        max_fringe_size += fringe
+    for process in processes:
+        process.join()
+
+    nodes_expanded = sum(expansions)
+    stats.worker_expansions = expansions
+    if verbose:
+        print(f"HDA* expansions per worker: {expansions}")
+    if solution is None:
+        return stats.finish([], nodes_expanded, max_fringe_size, 0)  # Return empty path if not found
+    actions = decodePath(solution[2], solution[1])
+    bf = search.branching_factor(len(actions), nodes_expanded)
+    return stats.finish(actions, nodes_expanded, max_fringe_size, bf)
+
+
+def _idaSubtree(node, threshold, heuristicOf, taskQueue, results, hungry, stop):
+    """
+    Bounded depth-first search of the subtree below node, an explicit stack
+    of frames [board, blank, g, h, path, untried moves].  Every 1024 nodes the
+    search gives up if stop is set, and if some worker is waiting for work
+    while the task queue is empty, sends the untried moves of its shallowest
+    frame to the main process, which queues them as new tasks.  Returns (nodes expanded, least f
+    above the threshold, deepest path, solution path or None).
+    """
+    neighbours, inverse = packedboard.NEIGHBOURS, packedboard.INVERSE_MOVE
+    stack = [list(node) + [None]]
+    nodes_expanded = 0
+    nextThreshold = math.inf
+    max_depth = 0
+
+    while stack:
+        frame = stack[-1]
+        board, blank, g, h, path, untried = frame
+        if untried is None:
+            if g + h > threshold:
+                nextThreshold = min(nextThreshold, g + h)
+                stack.pop()
+                continue
+            nodes_expanded += 1
+            max_depth = max(max_depth, g + 1)
+            if board == packedboard.GOAL_BOARD:
+                return nodes_expanded, nextThreshold, max_depth, (path, g)
+            # Reversed, so that popping tries the moves in their usual order
+            untried = frame[5] = [entry for entry in reversed(neighbours[blank])
+                                  if not g or entry[4] != inverse[path & 3]]  # Parent-move pruning
+
+            if not nodes_expanded & 1023:
+                if stop.is_set():
+                    break
+                if hungry.value and taskQueue.empty():
+                    donor = next((older for older in stack if older[5]), None)
+                    if donor is not None:
+                        # Queued by the main process, so that it counts them before any of them is done
+                        results.put(('donated', [_child(donor, entry, heuristicOf) for entry in donor[5]]))
+                        donor[5] = []
+                        untried = frame[5]
+
+        if untried:
+            stack.append(list(_child(frame, untried.pop(), heuristicOf)) + [None])
+        else:
+            stack.pop()
+    return nodes_expanded, nextThreshold, max_depth, None
+
+
+def _child(node, entry, heuristicOf):
+    """
+    Returns the (board, blank, g, h, path) tuple reached from node by the move
+    of a packedboard.NEIGHBOURS entry.
+    """
+    board, blank, g, h, path = node[:5]
+    target, targetShift, blankShift, _, code = entry
+    tile = (board >> targetShift) & 0xF
+    child = board - (tile << targetShift) + (tile << blankShift)
+    return child, target, g + 1, heuristicOf(board, blank, h, tile, target, child), (path << 2) | code
+
+
+def _idaWorker(taskQueue, results, hungry, stop, heuristic, problem):
+    """
+    Body of one parallelIdaStarSearch worker: takes (threshold, node) tasks
+    from the shared queue until it receives None, searches each subtree and
+    reports a ('done', ...) message for it.
+    """
+    heuristicOf = _childEvaluator(heuristic, problem)
+    while True:
+        with hungry.get_lock():
+            hungry.value += 1
+        task = taskQueue.get()
+        with hungry.get_lock():
+            hungry.value -= 1
+        if task is None:
+            results.put(('exit',))
+            return
+        if stop.is_set():
+            continue  # The goal has been found; drain the queue
+        threshold, node = task
+        nodes_expanded, nextThreshold, max_depth, solution = _idaSubtree(node, threshold, heuristicOf, taskQueue,
+                                                                          results, hungry, stop)
+        if solution is not None:
+            stop.set()
+        results.put(('done', nodes_expanded, nextThreshold, max_depth, solution))
+
+
+def parallelIdaStarSearch(problem, heuristic, workers=None, tasksPerWorker=16, verbose=True):
+    """
+    Iterative-deepening A* spread over a pool of worker processes.  Each
+    iteration expands the top plies breadth-first until there are about
+    tasksPerWorker subtrees per worker, puts them in a shared task queue and
+    lets the workers search them with the same f-bound.  A worker that runs
+    out of tasks while others are busy gets the untried moves of a busy
+    worker's shallowest frame, so a few large subtrees do not leave the pool
+    idle.  The first goal found within the bound is optimal, and it stops
+    every worker.
+
+    Returns the same util.SearchStats as idaStarSearch.  With verbose set,
+    the bound and node count of every iteration are printed.
+    """
+    stats = util.SearchStats()
+    workers = workers or os.cpu_count() or 1
+    context = multiprocessing.get_context()
+    taskQueue = context.Queue()
+    results = context.Queue()
+    hungry = context.Value('i', 0)  # Number of workers waiting for a task
+    stop = context.Event()
+    heuristicOf = _childEvaluator(heuristic, problem)
+    neighbours, inverse = packedboard.NEIGHBOURS, packedboard.INVERSE_MOVE
+
+    processes = [context.Process(target=_idaWorker,
+                                 args=(taskQueue, results, hungry, stop, heuristic, problem), daemon=True)
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+
+    start = problem.getStartState()
+    root = (start.board, start.blank, 0, heuristic(start, problem), 0)
+    threshold = root[3]
+    nodes_expanded = 0
+    max_fringe_size = 0
+    solution = None
+    while solution is None and threshold < math.inf:
+        iterationStart = nodes_expanded
+        nextThreshold = math.inf
+        # Split the top of the tree into tasks
+        layer = [root]
+        while layer and len(layer) < tasksPerWorker * workers and solution is None:
+            children = []
+            for node in layer:
+                board, blank, g, h, path = node
+                if g + h > threshold:
+                    nextThreshold = min(nextThreshold, g + h)
+                    continue
+                nodes_expanded += 1
+                max_fringe_size = max(max_fringe_size, g + 1)
+                if board == packedboard.GOAL_BOARD:
+                    solution = (path, g)
+                    break
+                children.extend(_child(node, entry, heuristicOf) for entry in neighbours[blank]
+                                if not g or entry[4] != inverse[path & 3])
+            layer = children
+        if solution is None:
+            for node in layer:
+                taskQueue.put((threshold, node))
+            outstanding = len(layer)
+            while outstanding:
+                message = results.get()
+                if message[0] == 'donated':
+                    for node in message[1]:
+                        taskQueue.put((threshold, node))
+                    outstanding += len(message[1])
+                    continue
+                outstanding -= 1
+                _, expanded, taskThreshold, depth, found = message
+                nodes_expanded += expanded
+                nextThreshold = min(nextThreshold, taskThreshold)
+                max_fringe_size = max(max_fringe_size, depth)
+                if found is not None:
+                    solution = found
+                    break
+        if verbose:
+            print(f"Parallel IDA* iteration: threshold {threshold}, nodes expanded {nodes_expanded - iterationStart}")
+        threshold = nextThreshold
+
+    stop.set()
+    for _ in processes:
+        taskQueue.put(None)
+    exited = 0
+    while exited < workers:  # Drain the results so that every worker can exit
+        exited += results.get()[0] == 'exit'
+    for process in processes:
+        process.join()
+
+    if solution is None:
+        return stats.finish([], nodes_expanded, max_fringe_size, 0)  # Return empty path if not found
+    actions = decodePath(*solution)
+    bf = search.branching_factor(len(actions), nodes_expanded)
+    return stats.finish(actions, nodes_expanded, max_fringe_size, bf)
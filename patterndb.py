@@ -0,0 +1,544 @@
+# patterndb.py
+# ------------
+# Additive disjoint pattern databases for the fifteen-puzzle.
+#
+# A pattern is a set of tiles.  Its database holds, for every placement of
+# those tiles, the fewest moves that bring them to their goal cells when a
+# pattern tile may slide to any neighbouring cell not holding another pattern
+# tile, the other tiles and the blank being free to rearrange at no cost.
+# Every move of the puzzle moves a single tile, so it changes the value of at
+# most one pattern of a partition of the tiles, by at most one: the values of
+# the patterns can be added and stay admissible and consistent.
+#
+# A database is built by a breadth-first search backwards from the goal
+# placement.  Every layer's frontier is cut into shards that a pool of worker
+# processes expand, each into a file of its own.  After every layer the
+# distances and the next frontier are saved with a manifest holding their
+# checksums, so an interrupted build resumes from the last completed layer,
+# and from the shards already expanded in the next one.  The finished
+# database is a file of one unsigned byte per placement, indexed by
+# rankPattern, which is memory-mapped when loaded; its checksum in the
+# manifest lets a copy made on another host be verified.  Smaller copies
+# keep the least of every few consecutive entries, or every entry modulo 3
+# in 2 bits (see compressPatternDatabase).  build_pdb.py is the
+# command-line entry point.
+
+import array
+import contextlib
+import glob
+import hashlib
+import json
+import mmap
+import multiprocessing
+import os
+import time
+
+import packedboard
+import util
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent builds there must not share a directory
+    fcntl = None
+
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pdb')
+
+# Tile partitions for the standard goal.  Each pattern lists its tiles in the
+# order rankPattern reads their cells.
+PARTITIONS = {
+    '5-5-5': ((1, 2, 3, 5, 6), (4, 7, 8, 11, 12), (9, 10, 13, 14, 15)),
+    '6-6-3': ((1, 5, 6, 9, 10, 13), (7, 8, 11, 12, 14, 15), (2, 3, 4)),
+}
+DEFAULT_PARTITION = '5-5-5'
+
+STORAGES = ('full', 'min', 'mod3')  # Database file layouts (see compressPatternDatabase)
+
+LOCK = 'build.lock'  # Held by the process building or compressing into a directory
+UNKNOWN = 0xFF  # Distance of a placement not reached yet
+CELL_NEIGHBOURS = tuple(tuple(entry[0] for entry in entries) for entries in packedboard.NEIGHBOURS)
+
+
+def entryCount(size):
+    """
+    Returns the number of placements of size distinct tiles on the board.
+    """
+    count = 1
+    for index in range(size):
+        count *= packedboard.CELLS - index
+    return count
+
+
+def rankPattern(positions):
+    """
+    Returns the index in [0, entryCount(len(positions))) of a placement given
+    as the cells of the pattern tiles, in pattern order.
+    """
+    rank = 0
+    used = 0
+    for index, cell in enumerate(positions):
+        rank = rank * (packedboard.CELLS - index) + cell - (used & ((1 << cell) - 1)).bit_count()
+        used |= 1 << cell
+    return rank
+
+
+def unrankPattern(rank, size):
+    """
+    Returns the list of cells of the placement of size tiles with the given
+    rank (the inverse of rankPattern).
+    """
+    digits = [0] * size
+    for index in range(size - 1, -1, -1):
+        rank, digits[index] = divmod(rank, packedboard.CELLS - index)
+    free = list(range(packedboard.CELLS))
+    return [free.pop(digit) for digit in digits]
+
+
+def goalPositions(pattern):
+    """
+    Returns the goal cells of the tiles of a pattern.
+    """
+    return [packedboard.GOAL_TILES.index(tile) for tile in pattern]
+
+
+def patternName(pattern):
+    return 'pdb-' + '-'.join(str(tile) for tile in pattern)
+
+
+def databasePath(pattern, directory=DEFAULT_DIRECTORY):
+    """
+    Returns the path of the finished database file of a pattern.
+    """
+    return os.path.join(directory, patternName(pattern) + '.bin')
+
+
+def expandPlacements(size, distances, frontier):
+    """
+    Returns the sorted array of the placements, not yet given a distance in
+    distances, reached from the placements of frontier (given by rank) by
+    moving one pattern tile.
+    """
+    children = set()
+    for rank in frontier:
+        positions = unrankPattern(rank, size)
+        occupied = 0
+        for cell in positions:
+            occupied |= 1 << cell
+        for index, cell in enumerate(positions):
+            for target in CELL_NEIGHBOURS[cell]:
+                if occupied >> target & 1:
+                    continue
+                positions[index] = target
+                child = rankPattern(positions)
+                if distances[child] == UNKNOWN:
+                    children.add(child)
+            positions[index] = cell
+    return array.array('Q', sorted(children))
+
+
+def _checkpointPaths(directory, pattern, depth):
+    prefix = os.path.join(directory, f'{patternName(pattern)}-{depth:03d}')
+    return prefix + '.distances', prefix + '.frontier'
+
+
+def _shardPath(directory, pattern, depth, shard):
+    return os.path.join(directory, f'{patternName(pattern)}-{depth:03d}-{shard:05d}.children')
+
+
+def _writeFile(path, data):
+    """Writes bytes-like data to path through util.atomicWrite."""
+    with util.atomicWrite(path) as file:
+        file.write(data)
+
+
+def _readFile(path, typecode):
+    values = array.array(typecode)
+    with open(path, 'rb') as file:
+        values.frombytes(file.read())
+    return values
+
+
+def checksum(path):
+    """
+    Returns the SHA-256 hex digest of a file.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _manifestPath(directory, pattern):
+    return os.path.join(directory, patternName(pattern) + '.json')
+
+
+def _loadManifest(directory, pattern):
+    path = _manifestPath(directory, pattern)
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        manifest = json.load(file)
+    if manifest['pattern'] != list(pattern) or manifest['goal'] != packedboard.GOAL_BOARD:
+        raise ValueError(f"{path} records a build of another pattern or goal.")
+    return manifest
+
+
+def _saveManifest(directory, pattern, manifest):
+    _writeFile(_manifestPath(directory, pattern), json.dumps(manifest, indent=1).encode())
+
+
+def _saveCheckpoint(directory, pattern, manifest, depth, distances, frontier):
+    """
+    Saves the distances of the placements up to depth and the frontier of
+    the placements at depth, then records them in the manifest with their
+    checksums and removes the previous checkpoint.
+    """
+    paths = _checkpointPaths(directory, pattern, depth)
+    _writeFile(paths[0], distances)
+    _writeFile(paths[1], frontier)
+    previous = manifest['depth']
+    manifest['depth'] = depth
+    manifest['checksums'] = {os.path.basename(path): checksum(path) for path in paths}
+    _saveManifest(directory, pattern, manifest)
+    if previous is not None and previous != depth:
+        for path in _checkpointPaths(directory, pattern, previous) + tuple(
+                glob.glob(os.path.join(directory, f'{patternName(pattern)}-{previous:03d}-*.children'))):
+            os.remove(path)
+
+
+@contextlib.contextmanager
+def _directoryLock(directory):
+    """
+    Holds an exclusive lock on directory, so that processes building into
+    it, such as solvers started together with build set, take turns instead
+    of removing each other's temporary files.
+    """
+    with open(os.path.join(directory, LOCK), 'a') as file:
+        if fcntl is not None:
+            fcntl.flock(file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+
+def _expandShard(task):
+    """
+    Expands one shard of the frontier of a checkpoint into its children
+    file, unless an earlier run already wrote it.  Runs in pool workers.
+    """
+    pattern, directory, depth, shard, shardSize = task
+    path = _shardPath(directory, pattern, depth, shard)
+    if os.path.exists(path):
+        return shard
+    distancesPath, frontierPath = _checkpointPaths(directory, pattern, depth)
+    frontier = array.array('Q')
+    with open(frontierPath, 'rb') as file:
+        file.seek(shard * shardSize * frontier.itemsize)
+        frontier.frombytes(file.read(shardSize * frontier.itemsize))
+    with open(distancesPath, 'rb') as file:
+        distances = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        _writeFile(path, expandPlacements(len(pattern), distances, frontier))
+    finally:
+        distances.close()
+    return shard
+
+
+def buildPatternDatabase(pattern, directory=DEFAULT_DIRECTORY, workers=1, shardSize=1 << 15, verbose=True):
+    """
+    Builds the database of a pattern (a sequence of distinct tiles) into
+    directory, resuming an interrupted build of the same pattern.  Each
+    layer's frontier is cut into shards of shardSize placements that a pool
+    of workers processes expand; a shard already expanded by an interrupted
+    run is not expanded again.  The search is deterministic, so the file is
+    the same wherever and with however many workers it is built, and its
+    checksum is recorded in the manifest; a finished database found missing
+    or not matching it is built again from scratch.  The build holds the
+    directory's lock throughout, so a process asking for a database another one is
+    building waits for it.  Returns the path of the database file.
+    """
+    pattern = tuple(pattern)
+    size = len(pattern)
+    if not 0 < size < packedboard.CELLS or len(set(pattern)) != size or not set(pattern) <= set(range(1, 16)):
+        raise ValueError(f"{pattern} is not a set of fifteen-puzzle tiles.")
+    os.makedirs(directory, exist_ok=True)
+    with _directoryLock(directory):
+        return _buildPatternDatabase(pattern, directory, workers, shardSize, verbose)
+
+
+def _discardBuild(directory, pattern):
+    """
+    Removes the database file of a pattern, its manifest and any checkpoint
+    or shard a build left behind, so that the next build starts from
+    scratch.
+    """
+    name = patternName(pattern)
+    paths = [databasePath(pattern, directory), _manifestPath(directory, pattern)]
+    for suffix in ('.distances', '.frontier', '-*.children'):
+        paths += glob.glob(os.path.join(directory, f'{name}-[0-9][0-9][0-9]{suffix}'))
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _buildPatternDatabase(pattern, directory, workers, shardSize, verbose):
+    size = len(pattern)
+    manifest = _loadManifest(directory, pattern)
+    path = databasePath(pattern, directory)
+    if manifest is not None and manifest['complete']:
+        if os.path.exists(path) and checksum(path) == manifest['checksum']:
+            return path
+        # The database went missing or changed since it was built: start over
+        _discardBuild(directory, pattern)
+        manifest = None
+
+    # Leftovers of an interrupted write
+    for leftover in glob.glob(os.path.join(directory, patternName(pattern) + '*.tmp')):
+        os.remove(leftover)
+
+    if manifest is None or manifest['depth'] is None:
+        manifest = {'pattern': list(pattern), 'goal': packedboard.GOAL_BOARD, 'shardSize': shardSize,
+                    'depth': None, 'checksums': {}, 'complete': False}
+        distances = bytearray([UNKNOWN]) * entryCount(size)
+        goal = rankPattern(goalPositions(pattern))
+        distances[goal] = 0
+        _saveCheckpoint(directory, pattern, manifest, 0, distances, array.array('Q', [goal]))
+    else:
+        for name, expected in manifest['checksums'].items():
+            if checksum(os.path.join(directory, name)) != expected:
+                raise ValueError(f"Checkpoint {name} in {directory} does not match its checksum.")
+        distances = bytearray(_readFile(_checkpointPaths(directory, pattern, manifest['depth'])[0], 'B'))
+    shardSize = manifest['shardSize']  # Shards written by an interrupted run keep their bounds
+
+    context = multiprocessing.get_context()
+    pool = context.Pool(workers) if workers > 1 else None
+    try:
+        while True:
+            depth = manifest['depth']
+            started = time.perf_counter()
+            frontierSize = os.path.getsize(_checkpointPaths(directory, pattern, depth)[1]) // 8
+            tasks = [(pattern, directory, depth, shard, shardSize) for shard in range(-(-frontierSize // shardSize))]
+            for _ in (pool.imap_unordered(_expandShard, tasks) if pool else map(_expandShard, tasks)):
+                pass
+
+            # Children reached from several shards are kept once, in shard order
+            frontier = array.array('Q')
+            for shard in range(len(tasks)):
+                for child in _readFile(_shardPath(directory, pattern, depth, shard), 'Q'):
+                    if distances[child] == UNKNOWN:
+                        distances[child] = depth + 1
+                        frontier.append(child)
+            if not frontier:
+                break
+            if depth + 1 >= UNKNOWN:
+                raise ValueError(f"Distances of pattern {pattern} do not fit in a byte.")
+            _saveCheckpoint(directory, pattern, manifest, depth + 1, distances, frontier)
+            if verbose:
+                print(f"Pattern database {patternName(pattern)}: depth {depth + 1}, {len(frontier)} placements, "
+                      f"{time.perf_counter() - started:.1f} s")
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    _writeFile(path, distances)
+    manifest.update(complete=True, checksum=checksum(path), checksums={})
+    _saveManifest(directory, pattern, manifest)
+    for checkpoint in _checkpointPaths(directory, pattern, depth) + tuple(
+            glob.glob(os.path.join(directory, f'{patternName(pattern)}-{depth:03d}-*.children'))):
+        os.remove(checkpoint)
+    return path
+
+
+def verifyPatternDatabase(pattern, directory=DEFAULT_DIRECTORY):
+    """
+    Returns whether the database file of a pattern is complete and matches
+    the checksum recorded when it was built, as after copying it with its
+    manifest from another host.
+    """
+    manifest = _loadManifest(directory, tuple(pattern))
+    path = databasePath(pattern, directory)
+    return (manifest is not None and manifest['complete'] and os.path.exists(path)
+            and checksum(path) == manifest['checksum'])
+
+
+def storagePath(pattern, directory=DEFAULT_DIRECTORY, storage='full', factor=2):
+    """
+    Returns the path of the database file of a pattern in one of STORAGES.
+    """
+    if storage == 'full':
+        return databasePath(pattern, directory)
+    if storage == 'min':
+        return os.path.join(directory, f'{patternName(pattern)}.min{factor}.bin')
+    if storage == 'mod3':
+        return os.path.join(directory, f'{patternName(pattern)}.mod3.bin')
+    raise ValueError(f"Unknown pattern database storage {storage!r}; expected one of {STORAGES}.")
+
+
+def storageSize(size, storage='full', factor=2):
+    """
+    Returns the number of bytes of the database of size tiles in a storage.
+    """
+    if storage == 'min':
+        return -(-entryCount(size) // factor)
+    if storage == 'mod3':
+        return -(-entryCount(size) // 4)
+    return entryCount(size)
+
+
+def compressPatternDatabase(pattern, directory=DEFAULT_DIRECTORY, storage='min', factor=2):
+    """
+    Writes the compressed copy of the finished database of a pattern, unless
+    it exists, and returns its path.  'min' keeps the least of every factor
+    consecutive entries, so placements whose ranks differ only in the last
+    tile's cell share an admissible value.  'mod3' keeps every distance
+    modulo 3 in 2 bits, four entries to a byte (see patternDatabaseHeuristic).
+    """
+    path = storagePath(pattern, directory, storage, factor)
+    if storage == 'full' or os.path.exists(path):
+        return path
+    with _directoryLock(directory):
+        if not os.path.exists(path):
+            _writeFile(path, _compress(pattern, directory, storage, factor))
+    return path
+
+
+def _compress(pattern, directory, storage, factor):
+    """
+    Returns the contents of the compressed copy of a finished database.
+    """
+    full = loadPatternDatabase(pattern, directory)
+    try:
+        entries = full[:]
+    finally:
+        full.close()
+    if storage == 'min':
+        compressed = bytes(min(entries[index:index + factor]) for index in range(0, len(entries), factor))
+    else:
+        entries += bytes(-len(entries) % 4)
+        compressed = bytes(entries[index] % 3 | entries[index + 1] % 3 << 2 | entries[index + 2] % 3 << 4
+                           | entries[index + 3] % 3 << 6 for index in range(0, len(entries), 4))
+    return compressed
+
+
+def loadPatternDatabase(pattern, directory=DEFAULT_DIRECTORY, storage='full', factor=2):
+    """
+    Memory-maps the finished database file of a pattern, in one of STORAGES,
+    read-only and returns it.  Indexing a full database by rankPattern gives
+    a distance.
+    """
+    path = storagePath(pattern, directory, storage, factor)
+    with open(path, 'rb') as file:
+        table = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(table) != storageSize(len(pattern), storage, factor):
+        table.close()
+        raise ValueError(f"{path} does not hold a {storage} database of {len(pattern)} tiles.")
+    return table
+
+
+def _moduloDistance(table, rank):
+    return table[rank >> 2] >> ((rank & 3) << 1) & 3
+
+
+def _descend(table, positions, goal):
+    """
+    Recovers the distance of a placement from a 'mod3' database by walking
+    down to the goal placement.  Of the placements one move away, those one
+    move closer are the only ones whose distance modulo 3 is one less.
+    """
+    positions = list(positions)
+    rank = rankPattern(positions)
+    remainder = _moduloDistance(table, rank)
+    distance = 0
+    while rank != goal:
+        occupied = 0
+        for cell in positions:
+            occupied |= 1 << cell
+        closer = (remainder + 2) % 3
+        for index, cell in enumerate(positions):
+            for target in CELL_NEIGHBOURS[cell]:
+                if occupied >> target & 1:
+                    continue
+                positions[index] = target
+                child = rankPattern(positions)
+                if _moduloDistance(table, child) == closer:
+                    break
+                positions[index] = cell
+            else:
+                continue
+            break
+        else:
+            raise ValueError(f"Placement {positions} has no neighbour closer to the goal; the database is corrupt.")
+        rank, remainder = child, closer
+        distance += 1
+    return distance
+
+
+def patternDatabaseHeuristic(partition=DEFAULT_PARTITION, directory=DEFAULT_DIRECTORY, build=True,
+                             storage='full', factor=2):
+    """
+    Returns a heuristic function(state, problem=None) adding the databases
+    of a partition, given as a name in PARTITIONS or a sequence of disjoint
+    patterns.  Databases missing from directory are built, and compressed
+    to the storage asked for, first when build is set.
+
+    'full' reads one byte per placement.  'min' reads a database compressed
+    by factor (see compressPatternDatabase); its values are still
+    admissible but can drop by more than one per move, so the heuristic's
+    'inconsistent' attribute is set for aStarSearch to reopen states.
+    'mod3' reads 2 bits per placement: every move changes one pattern's
+    distance by at most one, so a distance follows from its parent's and
+    its own value modulo 3.  The heuristic's 'derive' attribute, with the
+    per-pattern distances as its values, lets aStarSearch and idaStarSearch
+    carry them from node to node; called on its own, it walks every pattern
+    down to the goal instead, which is far slower.
+    """
+    patterns = [tuple(pattern) for pattern in (PARTITIONS[partition] if isinstance(partition, str) else partition)]
+    tiles = [tile for pattern in patterns for tile in pattern]
+    if len(set(tiles)) != len(tiles):
+        raise ValueError(f"The patterns {patterns} are not disjoint.")
+    lookups = []
+    for pattern in patterns:
+        if build and not os.path.exists(storagePath(pattern, directory, storage, factor)):
+            if not os.path.exists(databasePath(pattern, directory)):
+                buildPatternDatabase(pattern, directory)
+            compressPatternDatabase(pattern, directory, storage, factor)
+        lookups.append((pattern, loadPatternDatabase(pattern, directory, storage, factor)))
+    shifts = tuple(enumerate(packedboard.SHIFT))
+
+    def tileCells(state):
+        board = state.board
+        cells = [0] * packedboard.CELLS  # Cell of every tile
+        for cell, shift in shifts:
+            cells[board >> shift & 0xF] = cell
+        return cells
+
+    if storage != 'mod3':
+        step = factor if storage == 'min' else 1
+
+        def heuristic(state, problem=None):
+            cells = tileCells(state)
+            return sum(table[rankPattern([cells[tile] for tile in pattern]) // step] for pattern, table in lookups)
+
+        if storage == 'min':
+            heuristic.inconsistent = True
+        return heuristic
+
+    goals = [rankPattern(goalPositions(pattern)) for pattern, _ in lookups]
+    steps = (0, 1, -1)  # Change of distance for each difference of the remainders
+
+    def derive(state, parentValues=None):
+        cells = tileCells(state)
+        if parentValues is None:
+            return tuple(_descend(table, [cells[tile] for tile in pattern], goal)
+                         for (pattern, table), goal in zip(lookups, goals))
+        return tuple(parent + steps[(_moduloDistance(table, rankPattern([cells[tile] for tile in pattern])) - parent) % 3]
+                     for (pattern, table), parent in zip(lookups, parentValues))
+
+    def heuristic(state, problem=None):
+        return sum(derive(state))
+
+    heuristic.derive = (derive, sum)
+    return heuristic
@@ -16,8 +16,17 @@
 In search.py, we implement generic search algorithms which are called by
 Pacman agents (in searchAgents.py).
 """
+import collections
+import heapq
+import itertools
 import math
+import os
+import pickle
+import sys
+import time
 
+import movepruning
+import packedboard
 import util
 from math import sqrt
 from queue import PriorityQueue
@@ -63,6 +72,25 @@ class SearchProblem:
         """
         util.raiseNotDefined()
 
+    def getGoalState(self):
+        """
+        Returns the single goal state.  Only needed by the bidirectional
+        searches.
+        """
+        util.raiseNotDefined()
+
+    def getPredecessors(self, state):
+        """
+          state: Search state
+
+        For a given state, this should return a list of triples, (predecessor,
+        action, stepCost), where applying 'action' to 'predecessor' leads to
+        state at a cost of 'stepCost'.  Only needed by the bidirectional
+        searches; aStarSearch uses it to rebuild its solution path without
+        storing parent links.
+        """
+        util.raiseNotDefined()
+
 
 def branching_factor(depth, num_expandedNodes):
     if (depth == 0):
@@ -72,6 +100,89 @@ def branching_factor(depth, num_expandedNodes):
     return b
 
 
+# aStarSearch packs each transposition table entry into one int,
+# (g << 1 | closed) << _MOVE_BITS | index of the action that reached the state
+_MOVE_BITS = 8
+_MOVE_MASK = (1 << _MOVE_BITS) - 1
+_CLOSED = 1 << _MOVE_BITS
+
+
+def _tableKey(state):
+    """
+    Returns the transposition table key of a state: the packed board of a
+    puzzle state, so that expanded states need not be kept, or else the
+    state itself.
+    """
+    return getattr(state, 'board', state)
+
+
+def _implements(problem, method):
+    """
+    Returns whether problem provides a method that SearchProblem leaves
+    undefined, such as getPredecessors, rather than inheriting the stub.
+    """
+    return getattr(type(problem), method, None) not in (None, getattr(SearchProblem, method, None))
+
+
+def _isPackedPuzzle(problem):
+    """
+    Returns whether problem is a FifteenPuzzleSearchProblem with its own
+    goal test and moves, whose packed boards the uninformed searches may
+    walk directly instead of calling isGoalState and getSuccessors.
+    """
+    import fifteenpuzzle  # Imports this module, so it is only loaded once a search runs
+    puzzleProblem, puzzleState = fifteenpuzzle.FifteenPuzzleSearchProblem, fifteenpuzzle.fifteen_Puzzle_State
+    if not isinstance(problem, puzzleProblem):
+        return False
+    if any(getattr(type(problem), method) is not getattr(puzzleProblem, method)
+           for method in ('isGoalState', 'getSuccessors')):
+        return False
+    startState = problem.getStartState()
+    return isinstance(startState, puzzleState) and type(startState).isGoal is puzzleState.isGoal
+
+
+def reconstructPath(problem, table, moves, startState, state, parents=None):
+    """
+    Rebuilds the actions from startState to state out of an aStarSearch
+    transposition table.  Each entry packs a state's g-value, closed flag and
+    the index in moves of the action that reached it, so the parent is the
+    predecessor (see SearchProblem.getPredecessors) reached by that action.
+    Problems without getPredecessors pass parents instead, mapping every
+    table key to its parent's key.
+    """
+    actions = []
+    startKey = _tableKey(startState)
+    key = _tableKey(state)
+    while key != startKey:
+        action = moves[table[key] & _MOVE_MASK]
+        if parents is not None:
+            key = parents[key]
+        else:
+            state = next(predecessor for predecessor, predecessorAction, _ in problem.getPredecessors(state)
+                         if predecessorAction == action)
+            key = _tableKey(state)
+        actions.append(action)
+    actions.reverse()
+    return actions
+
+
+def _aStarMemory(table, peakOpen, openEntry):
+    """
+    Estimates the bytes held by each structure of aStarSearch at its peak:
+    the transposition table's hash table, its keys and packed entries, and
+    the open list, whose peakOpen entries are sized like openEntry and hold
+    the only reference to their state.  The table only grows, so its final
+    size is its peak.
+    """
+    key, entry = next(iter(table.items()))
+    return {
+        'table': sys.getsizeof(table),
+        'keys': len(table) * sys.getsizeof(key),
+        'entries': len(table) * sys.getsizeof(entry),
+        'open list': peakOpen * (sys.getsizeof(openEntry) + 8 + sys.getsizeof(openEntry[0])),
+    }
+
+
 def tinyMazeSearch(problem):
     """
     Returns a sequence of moves that solves tinyMaze.  For any other maze, the
@@ -86,149 +197,536 @@ def tinyMazeSearch(problem):
 import util
 
 
-def depthFirstSearch(problem, maxDepth=25):
-    """Search the deepest nodes in the search tree first, constrained by max depth."""
+def _genericDepthFirstSearch(problem, maxDepth, stats, budget):
+    """
+    depthFirstSearch for any SearchProblem: a stack of (state, depth) over
+    getSuccessors and isGoalState, with the same explored set and depth
+    limit as the search over the puzzle cursor.
+    """
+    detailed = stats.detailed
+    exploredNodes = set()
+    stack = [(problem.getStartState(), 0)]
+    max_fringe_size = 0
+    depth = 0
+
+    while stack:
+        state, depth = stack.pop()
+
+        # Skip nodes beyond the maximum depth and nodes that were already explored
+        if depth > maxDepth or state in exploredNodes:
+            if detailed and depth <= maxDepth:
+                stats.duplicates_pruned += 1
+            continue
+
+        if budget is not None:
+            reason = budget.exceeded(len(exploredNodes))
+            if reason:
+                stats.peak_closed_size = len(exploredNodes)
+                return util.BudgetExceeded(reason, None, len(exploredNodes), max_fringe_size, depth, stats)
 
-    # Stack to hold nodes in the form (state, actions leading to the state, current depth)
-    frontier = util.Stack()
-    # Set to keep track of explored nodes
+        exploredNodes.add(state)
+        if problem.isGoalState(state):
+            bf = branching_factor(depth, len(exploredNodes))
+            return stats.finish(depth, len(exploredNodes), max_fringe_size, bf, len(exploredNodes))
+
+        successors = problem.getSuccessors(state)
+        if detailed:
+            stats.nodes_generated += len(successors)
+        for succState, succAction, succCost in successors:
+            if succState not in exploredNodes:
+                stack.append((succState, depth + 1))
+            elif detailed:
+                stats.duplicates_pruned += 1
+        max_fringe_size = max(max_fringe_size, len(stack))
+
+    print(f"No solution was found due to reaching max depth: {maxDepth}.")
+    return stats.finish(depth, len(exploredNodes), max_fringe_size, 0, len(exploredNodes))
+
+
+def depthFirstSearch(problem, maxDepth=25, deadline=None, maxNodes=None):
+    """
+    Search the deepest nodes in the search tree first, constrained by max depth.
+    On the fifteen puzzle with its standard goal (see _isPackedPuzzle), a
+    single FifteenPuzzleCursor is walked with apply/undo, and the move
+    undoing the previous one is not generated, as it always leads back to an
+    explored state.  Longer duplicate move sequences (see movepruning) are
+    not pruned: with the explored set, that could block the only path the
+    search would still take to a state.  Any other problem is searched
+    through its getSuccessors and isGoalState (see _genericDepthFirstSearch).
+
+    Like every search in this module, it returns a util.SearchStats that
+    unpacks as (solution depth, nodes expanded, max fringe size, branching
+    factor), and it stops with a util.BudgetExceeded outcome once
+    time.monotonic() passes deadline or maxNodes nodes were expanded (see
+    util.SearchBudget).
+    """
+    stats = util.SearchStats()
+    detailed = stats.detailed
+    budget = util.SearchBudget.create(deadline, maxNodes)
+    if not _isPackedPuzzle(problem):
+        return _genericDepthFirstSearch(problem, maxDepth, stats, budget)
+
+    # Walk a single mutable board with apply/undo instead of creating a state per node
+    cursor = problem.getStartState().cursor()
+    # Set to keep track of explored nodes (packed boards)
     exploredNodes = set()
     max_fringe_size = 0
     current_fringe_size = 0
+    depth = 0
 
-    # Get the start state of the problem
-    startState = problem.getStartState()
-    # Start node (state, actions, current depth)
-    startNode = (startState, [], 0)
-
-    # Push the start node to the frontier
-    frontier.push(startNode)
+    # One frame of pending moves per node on the current path; the root frame holds
+    # the start node itself (no move)
+    stack = [[None]]
+    path = []  # Moves applied to the cursor, one per level below the root
+    transitions = movepruning.machine(2)
+    machineStates = [movepruning.START]  # Pruning machine state of every node on the path
     current_fringe_size += 1  # Increase fringe size when a new node is added
 
     # Continue exploring until the frontier is empty
-    while not frontier.isEmpty():
+    while stack:
+        frame = stack[-1]
+        if not frame:
+            # Every child of this node has been tried: step back to its parent
+            stack.pop()
+            if path:
+                cursor.undo(path.pop())
+                machineStates.pop()
+            continue
+
         # Pop the most recent node from the frontier
-        currentState, actions, depth = frontier.pop()
+        move = frame.pop()
         current_fringe_size -= 1  # Decrease fringe size when a node is removed
-        depth = max(depth, len(actions))
-        # If the current depth exceeds the maximum depth, skip this node
-        if depth > maxDepth:
+        if move is not None:
+            cursor.apply(move)
+            path.append(move)
+            machineStates.append(transitions[machineStates[-1]][move])
+        depth = len(path)
+
+        # Skip nodes beyond the maximum depth and nodes that were already explored
+        if depth > maxDepth or cursor.board in exploredNodes:
+            if detailed and depth <= maxDepth:
+                stats.duplicates_pruned += 1
+            if move is not None:
+                cursor.undo(path.pop())
+                machineStates.pop()
             continue
 
-        # If the current state hasn't been explored
-        if currentState not in exploredNodes:
-            # Mark the current state as explored
-            exploredNodes.add(currentState)
-
-            # If the current state is the goal, return the actions leading to it
-            if problem.isGoalState(currentState):
-                bf = branching_factor(depth, len(exploredNodes))
-                return depth, len(exploredNodes), max_fringe_size, bf
+        if budget is not None:
+            reason = budget.exceeded(len(exploredNodes))
+            if reason:
+                stats.peak_closed_size = len(exploredNodes)
+                return util.BudgetExceeded(reason, None, len(exploredNodes), max_fringe_size, depth, stats)
 
-            # Get successors of the current state (successor, action, cost)
-            successors = problem.getSuccessors(currentState)
+        # Mark the current state as explored
+        exploredNodes.add(cursor.board)
 
-            # Add successors to the frontier if they haven't been explored
-            for succState, succAction, succCost in successors:
-                if succState not in exploredNodes:
-                    newAction = actions + [succAction]
-                    newNode = (succState, newAction, depth + 1)
-                    frontier.push(newNode)
-                    current_fringe_size += 1  # Increase fringe size for each new successor added
-                    max_fringe_size = max(max_fringe_size, current_fringe_size)
+        # If the current state is the goal, return the depth of the path leading to it
+        if cursor.isGoal():
+            bf = branching_factor(depth, len(exploredNodes))
+            return stats.finish(depth, len(exploredNodes), max_fringe_size, bf, len(exploredNodes))
+
+        # Queue the moves leading to successors that haven't been explored
+        board, tiles = cursor.board, cursor.tiles
+        row = transitions[machineStates[-1]]
+        children = []
+        for target, targetShift, blankShift, _, code in cursor.moves():
+            if row[code] < 0:  # Undoes the previous move
+                continue
+            tile = tiles[target]
+            if board - (tile << targetShift) + (tile << blankShift) not in exploredNodes:
+                children.append(code)
+        if detailed:
+            generated = sum(row[entry[4]] >= 0 for entry in cursor.moves())
+            stats.nodes_generated += generated
+            stats.duplicates_pruned += generated - len(children)
+        stack.append(children)
+        current_fringe_size += len(children)  # Increase fringe size for each new successor added
+        max_fringe_size = max(max_fringe_size, current_fringe_size)
 
     # If no solution is found, print and return an empty list
     print(f"No solution was found due to reaching max depth: {maxDepth}.")
-    return depth, len(exploredNodes), max_fringe_size, 0
+    return stats.finish(depth, len(exploredNodes), max_fringe_size, 0, len(exploredNodes))
 
 
-import queue  # Built-in Python module
+def _genericIterativeDeepeningSearch(problem, maxDepth, stats, budget):
+    """
+    iterativeDeepeningSearch for any SearchProblem: the same depth-limited
+    searches over getSuccessors and isGoalState, checking cycles against the
+    states on the current path.
+    """
+    detailed = stats.detailed
+    startState = problem.getStartState()
+    onPath = {startState}
+    nodes_expanded = 0
+    max_fringe_size = 0
+    stopReason = None
+
+    def depthLimitedSearch(state, depth, limit):
+        nonlocal nodes_expanded, max_fringe_size, stopReason
+        if budget is not None:
+            stopReason = budget.exceeded(nodes_expanded)
+            if stopReason:
+                return True  # Unwinds the recursion like a solution; the caller checks stopReason
+        nodes_expanded += 1
+        max_fringe_size = max(max_fringe_size, depth + 1)
+        if problem.isGoalState(state):
+            return True
+        if depth == limit:
+            return False
+
+        for succState, succAction, succCost in problem.getSuccessors(state):
+            if detailed:
+                stats.nodes_generated += 1
+            if succState in onPath:
+                if detailed:
+                    stats.duplicates_pruned += 1
+                continue
+            onPath.add(succState)
+            if depthLimitedSearch(succState, depth + 1, limit):
+                return True
+            onPath.remove(succState)
+        return False
+
+    for limit in range(maxDepth + 1):
+        if depthLimitedSearch(startState, 0, limit):
+            if stopReason:
+                return util.BudgetExceeded(stopReason, None, nodes_expanded, max_fringe_size, limit, stats)
+            bf = branching_factor(limit, nodes_expanded)
+            return stats.finish(limit, nodes_expanded, max_fringe_size, bf)
 
+    print(f"No solution was found due to reaching max depth: {maxDepth}.")
+    return stats.finish(maxDepth, nodes_expanded, max_fringe_size, 0)
 
-def breadthFirstSearch(problem):
-    """Search the shallowest nodes in the search tree first."""
 
-    # To be explored (FIFO)
-    frontier = queue.Queue()
-    exploredNodes = set()  # Using a set for faster lookup
+def iterativeDeepeningSearch(problem, maxDepth=80, deadline=None, maxNodes=None):
+    """
+    Depth-limited depth-first searches with limits 0, 1, 2, ... up to maxDepth
+    (80 moves solve any 15-puzzle).  On the fifteen puzzle with its standard
+    goal (see _isPackedPuzzle), the board is walked in place with a
+    FifteenPuzzleCursor and moves completing a duplicate move sequence are
+    never tried (see movepruning); any other problem is searched through its
+    getSuccessors and isGoalState (see _genericIterativeDeepeningSearch).
+    Cycles are only checked against the states on the current path, so
+    memory stays linear in the depth and the first solution found is a
+    shallowest one.
+
+    Returns the same (solution depth, nodes expanded, max fringe size,
+    branching factor) tuple as depthFirstSearch; nodes are counted over all
+    iterations and the max fringe size is the deepest path held in memory.
+    """
+    stats = util.SearchStats()
+    detailed = stats.detailed
+    budget = util.SearchBudget.create(deadline, maxNodes)
+    if not _isPackedPuzzle(problem):
+        return _genericIterativeDeepeningSearch(problem, maxDepth, stats, budget)
+    cursor = problem.getStartState().cursor()
+    transitions = movepruning.machine()
+    onPath = {cursor.board}  # Packed boards of the states on the current path
+    nodes_expanded = 0
     max_fringe_size = 0
+    stopReason = None
+
+    def depthLimitedSearch(depth, limit, machineState):
+        nonlocal nodes_expanded, max_fringe_size, stopReason
+        if budget is not None:
+            stopReason = budget.exceeded(nodes_expanded)
+            if stopReason:
+                return True  # Unwinds the recursion like a solution; the caller checks stopReason
+        nodes_expanded += 1
+        max_fringe_size = max(max_fringe_size, depth + 1)
+        if cursor.isGoal():
+            return True
+        if depth == limit:
+            return False
+
+        row = transitions[machineState]
+        for target, targetShift, blankShift, _, code in cursor.moves():
+            if row[code] < 0:  # Duplicate move sequence
+                continue
+            cursor.apply(code)
+            if detailed:
+                stats.nodes_generated += 1
+            if cursor.board not in onPath:
+                onPath.add(cursor.board)
+                if depthLimitedSearch(depth + 1, limit, row[code]):
+                    return True
+                onPath.remove(cursor.board)
+            elif detailed:
+                stats.duplicates_pruned += 1
+            cursor.undo(code)
+        return False
+
+    for limit in range(maxDepth + 1):
+        if depthLimitedSearch(0, limit, movepruning.START):
+            if stopReason:
+                return util.BudgetExceeded(stopReason, None, nodes_expanded, max_fringe_size, limit, stats)
+            bf = branching_factor(limit, nodes_expanded)
+            return stats.finish(limit, nodes_expanded, max_fringe_size, bf)
+
+    print(f"No solution was found due to reaching max depth: {maxDepth}.")
+    return stats.finish(maxDepth, nodes_expanded, max_fringe_size, 0)
 
-    # Get the start state of the problem
+
+def _genericBreadthFirstSearch(problem, stats, budget):
+    """
+    breadthFirstSearch for any SearchProblem: a FIFO queue of (state, depth)
+    over getSuccessors, testing each successor with isGoalState as it is
+    generated.  Every reached state is kept for duplicate detection, and the
+    closed list is every expanded state.
+    """
+    detailed = stats.detailed
     startState = problem.getStartState()
-    startNode = (startState, [], 0)  # (state, actions, cost)
+    if problem.isGoalState(startState):
+        return stats.finish(0, 1, 0, branching_factor(0, 1))
+
+    frontier = collections.deque([(startState, 0)])
+    reached = {startState}
+    nodes_expanded = 0
+    max_fringe_size = 1
     depth = 0
 
-    # Push the start node to the frontier
-    frontier.put(startNode)
+    while frontier:
+        state, depth = frontier.popleft()
+        if budget is not None:
+            reason = budget.exceeded(nodes_expanded)
+            if reason:
+                stats.peak_closed_size = nodes_expanded
+                return util.BudgetExceeded(reason, None, nodes_expanded, max_fringe_size, depth, stats)
+        nodes_expanded += 1
+        successors = problem.getSuccessors(state)
+        if detailed:
+            stats.nodes_generated += len(successors)
+
+        for succState, succAction, succCost in successors:
+            if succState in reached:
+                if detailed:
+                    stats.duplicates_pruned += 1
+                continue
+            if problem.isGoalState(succState):
+                max_fringe_size = max(max_fringe_size, len(frontier) + 1)
+                bf = branching_factor(depth + 1, nodes_expanded + 1)
+                return stats.finish(depth + 1, nodes_expanded + 1, max_fringe_size, bf, nodes_expanded + 1)
+            reached.add(succState)
+            frontier.append((succState, depth + 1))
+        max_fringe_size = max(max_fringe_size, len(frontier))
+
+    return stats.finish(depth, nodes_expanded, max_fringe_size, 0, nodes_expanded)
+
+
+def breadthFirstSearch(problem, deadline=None, maxNodes=None):
+    """
+    Search the shallowest nodes in the search tree first.
+
+    On the fifteen puzzle with its standard goal (see _isPackedPuzzle), the
+    search runs one layer at a time over packed boards: each layer is a dict
+    of board -> blank index, successors are generated straight from the
+    packedboard neighbour tables, and a successor is checked against the goal
+    as soon as it is generated.  Every move can be undone, so a successor of
+    layer d lies in layer d - 1, d or d + 1 and only those three layers are
+    kept for duplicate detection.  Any other problem is searched through its
+    getSuccessors and isGoalState (see _genericBreadthFirstSearch).
+
+    Returns (solution depth, nodes expanded, max fringe size, branching
+    factor); the goal counts as one expanded node, as in the other searches.
+    The closed list is the previous and the current layer.
+    """
+    stats = util.SearchStats()
+    detailed = stats.detailed
+    budget = util.SearchBudget.create(deadline, maxNodes)
+    if not _isPackedPuzzle(problem):
+        return _genericBreadthFirstSearch(problem, stats, budget)
+    startState = problem.getStartState()
+    goal = packedboard.GOAL_BOARD
+    neighbours = packedboard.NEIGHBOURS
 
-    while not frontier.empty():
-        # Begin exploring the first (earliest-pushed) node on frontier
-        currentState, actions, currentCost = frontier.get()
-        depth = max(depth, len(actions))
-        if currentState not in exploredNodes:
-            # Put popped node state into explored set
-            exploredNodes.add(currentState)
+    if startState.board == goal:
+        return stats.finish(0, 1, 0, branching_factor(0, 1))
 
-            # Check if the current state is the goal
-            if problem.isGoalState(currentState):
-                bf = branching_factor(len(actions), len(exploredNodes))
-                return len(actions), len(exploredNodes), max_fringe_size, bf
+    nodes_expanded = 0
+    max_fringe_size = 0
+    depth = 0
+    previousLayer = {}
+    layer = {startState.board: startState.blank}
 
-            else:
-                # List of (successor, action, stepCost)
-                successors = problem.getSuccessors(currentState)
+    while layer:
+        nextLayer = {}
+        remaining = len(layer)  # Nodes of this layer still waiting on the frontier
 
-                for succState, succAction, succCost in successors:
-                    newAction = actions + [succAction]
-                    newCost = currentCost + succCost
-                    newNode = (succState, newAction, newCost)
+        for board, blank in layer.items():
+            if budget is not None:
+                reason = budget.exceeded(nodes_expanded)
+                if reason:
+                    return util.BudgetExceeded(reason, None, nodes_expanded, max_fringe_size, depth, stats)
+            nodes_expanded += 1
+            remaining -= 1
+            if detailed:
+                stats.nodes_generated += len(neighbours[blank])
 
-                    # Add new node to the frontier if not already explored
-                    if succState not in exploredNodes:
-                        frontier.put(newNode)
-                        # Update max fringe size using qsize()
-                        max_fringe_size = max(max_fringe_size, frontier.qsize())
+            for target, targetShift, blankShift, _, _ in neighbours[blank]:
+                tile = (board >> targetShift) & 0xF
+                child = board - (tile << targetShift) + (tile << blankShift)
+                if child in nextLayer or child in previousLayer or child in layer:
+                    if detailed:
+                        stats.duplicates_pruned += 1
+                    continue
 
-    return len(actions), len(exploredNodes), max_fringe_size, 0
+                # Goal test on generation: the whole next layer need not be built
+                if child == goal:
+                    max_fringe_size = max(max_fringe_size, remaining + len(nextLayer) + 1)
+                    bf = branching_factor(depth + 1, nodes_expanded + 1)
+                    return stats.finish(depth + 1, nodes_expanded + 1, max_fringe_size, bf)
 
+                nextLayer[child] = target
 
-def uniformCostSearch(problem):
-    """Search the node of least total cost first."""
+            max_fringe_size = max(max_fringe_size, remaining + len(nextLayer))
+
+        stats.peak_closed_size = max(stats.peak_closed_size, len(previousLayer) + len(layer))
+        previousLayer, layer = layer, nextLayer
+        depth += 1
+
+    return stats.finish(depth, nodes_expanded, max_fringe_size, 0)
+
+
+def bidirectionalBreadthFirstSearch(problem, deadline=None, maxNodes=None):
+    """
+    Breadth-first search run from the start and from the goal at the same
+    time, always expanding one full layer of the smaller frontier.  The first
+    successor that the other side has already reached closes a shortest path,
+    since before that layer no state was reached from both sides.  Needs
+    getGoalState and getPredecessors from the problem.
+
+    Returns the same (solution depth, nodes expanded, max fringe size,
+    branching factor) tuple as breadthFirstSearch.  Both sides keep every
+    state they reached, which makes up the closed list.
+    """
+    if not (_implements(problem, 'getGoalState') and _implements(problem, 'getPredecessors')):
+        raise ValueError("bidirectionalBreadthFirstSearch needs getGoalState and getPredecessors from the problem.")
+    stats = util.SearchStats()
+    detailed = stats.detailed
+    budget = util.SearchBudget.create(deadline, maxNodes)
+    startState = problem.getStartState()
+    if problem.isGoalState(startState):
+        return stats.finish(0, 1, 0, branching_factor(0, 1))
+
+    # Each side maps the states it reached to their distance from its root
+    forward = {startState: 0}
+    backward = {problem.getGoalState(): 0}
+    forwardLayer, backwardLayer = [startState], list(backward)
+    forwardDepth = backwardDepth = 0
+    nodes_expanded = 0
+    max_fringe_size = 0
 
-    # to be explored (FIFO): holds (item, cost)
-    frontier = util.PriorityQueue()
+    while forwardLayer and backwardLayer:
+        expandForward = len(forwardLayer) <= len(backwardLayer)
+        if expandForward:
+            layer, depth, reached, other, expand = forwardLayer, forwardDepth, forward, backward, problem.getSuccessors
+        else:
+            layer, depth, reached, other, expand = backwardLayer, backwardDepth, backward, forward, problem.getPredecessors
+
+        nextLayer = []
+        for state in layer:
+            if budget is not None:
+                reason = budget.exceeded(nodes_expanded)
+                if reason:
+                    return util.BudgetExceeded(reason, None, nodes_expanded, max_fringe_size,
+                                               forwardDepth + backwardDepth, stats)
+            nodes_expanded += 1
+            for nextState, action, cost in expand(state):
+                if detailed:
+                    stats.nodes_generated += 1
+                if nextState in reached:
+                    if detailed:
+                        stats.duplicates_pruned += 1
+                    continue
+                if nextState in other:
+                    solution_depth = depth + 1 + other[nextState]
+                    max_fringe_size = max(max_fringe_size, len(forwardLayer) + len(backwardLayer) + len(nextLayer))
+                    bf = branching_factor(solution_depth, nodes_expanded)
+                    return stats.finish(solution_depth, nodes_expanded, max_fringe_size, bf,
+                                        len(forward) + len(backward))
+                reached[nextState] = depth + 1
+                nextLayer.append(nextState)
+
+        if expandForward:
+            forwardLayer, forwardDepth = nextLayer, forwardDepth + 1
+        else:
+            backwardLayer, backwardDepth = nextLayer, backwardDepth + 1
+        max_fringe_size = max(max_fringe_size, len(forwardLayer) + len(backwardLayer))
+
+    return stats.finish(forwardDepth + backwardDepth, nodes_expanded, max_fringe_size, 0,
+                        len(forward) + len(backward))
+
+
+def uniformCostSearch(problem, deadline=None, maxNodes=None):
+    """Search the node of least total cost first."""
+    stats = util.SearchStats()
+    detailed = stats.detailed
+    clock = time.perf_counter_ns
+    if detailed:
+        stats.timePhases('generation_ns', 'queue_ns')
+    budget = util.SearchBudget.create(deadline, maxNodes)
+
+    # to be explored: states keyed by cost, with O(log n) decrease-key
+    frontier = util.IndexedPriorityQueue()
     depth = 0
     # previously expanded states (for cycle checking), holds state:cost
     exploredNodes = {}
 
     startState = problem.getStartState()
-    startNode = (startState, [], 0)  # (state, action, cost)
+    # Best known (depth, cost) of every queued state; only the solution depth is reported
+    frontierNodes = {startState: (0, 0)}
     max_fringe_size = 0
-    frontier.push(startNode, 0)
+    frontier.push(startState, 0)
 
     while not frontier.isEmpty():
         # begin exploring first (lowest-cost) node on frontier
-        currentState, actions, currentCost = frontier.pop()
-        depth = max(depth, len(actions))
-        if (currentState not in exploredNodes) or (currentCost < exploredNodes[currentState]):
-            # put popped node's state into explored list
-            exploredNodes[currentState] = currentCost
-
-            if problem.isGoalState(currentState):
-                bf = branching_factor(depth, len(exploredNodes))
-                return depth, len(exploredNodes), max_fringe_size, bf
-            else:
-                # list of (successor, action, stepCost)
-                successors = problem.getSuccessors(currentState)
+        if detailed:
+            started = clock()
+        currentState = frontier.pop()
+        if detailed:
+            stats.queue_ns += clock() - started
+        currentDepth, currentCost = frontierNodes.pop(currentState)
+        if budget is not None:
+            reason = budget.exceeded(len(exploredNodes))
+            if reason:
+                stats.peak_closed_size = len(exploredNodes)
+                return util.BudgetExceeded(reason, None, len(exploredNodes), max_fringe_size, currentCost, stats)
+        depth = max(depth, currentDepth)
+        # put popped node's state into explored list
+        exploredNodes[currentState] = currentCost
+
+        if problem.isGoalState(currentState):
+            bf = branching_factor(depth, len(exploredNodes))
+            return stats.finish(depth, len(exploredNodes), max_fringe_size, bf, len(exploredNodes))
 
-                for succState, succAction, succCost in successors:
-                    newAction = actions + [succAction]
-                    newCost = currentCost + succCost
-                    newNode = (succState, newAction, newCost)
-                    max_fringe_size = max(max_fringe_size, len(frontier.heap))
-                    frontier.update(newNode, newCost)
+        # list of (successor, action, stepCost)
+        if detailed:
+            started = clock()
+            successors = problem.getSuccessors(currentState)
+            stats.generation_ns += clock() - started
+            stats.nodes_generated += len(successors)
+        else:
+            successors = problem.getSuccessors(currentState)
+
+        for succState, succAction, succCost in successors:
+            # Step costs are non-negative, so an explored state's cost is final
+            if succState in exploredNodes:
+                if detailed:
+                    stats.duplicates_pruned += 1
+                continue
+            newCost = currentCost + succCost
+            if detailed:
+                started = clock()
+                improved = frontier.update(succState, newCost)
+                stats.queue_ns += clock() - started
+                stats.duplicates_pruned += not improved
+            else:
+                improved = frontier.update(succState, newCost)
+            if improved:
+                frontierNodes[succState] = (currentDepth + 1, newCost)
+        max_fringe_size = max(max_fringe_size, len(frontier))
 
-    return depth, len(exploredNodes), max_fringe_size, 0
+    return stats.finish(depth, len(exploredNodes), max_fringe_size, 0, len(exploredNodes))
 
 
 def nullHeuristic(state, problem=None):
@@ -243,49 +741,80 @@ from queue import PriorityQueue
 from math import sqrt
 
 
-def h1(state, problem=None):
-    goal_state = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 0]
-    current_state = sum(state.cells, [])  # Flatten the 2D list
-    return sum(1 for i in range(16) if current_state[i] != goal_state[i] and current_state[i] != 0)
+GOAL_POSITION = {1: (0, 0), 2: (0, 1), 3: (0, 2), 4: (0, 3),
+                 5: (1, 0), 6: (1, 1), 7: (1, 2), 8: (1, 3),
+                 9: (2, 0), 10: (2, 1), 11: (2, 2), 12: (2, 3),
+                 13: (3, 0), 14: (3, 1), 15: (3, 2), 0: (3, 3)}
 
 
-def h2(state, problem=None):
-    goal_position = {1: (0, 0), 2: (0, 1), 3: (0, 2), 4: (0, 3),
-                     5: (1, 0), 6: (1, 1), 7: (1, 2), 8: (1, 3),
-                     9: (2, 0), 10: (2, 1), 11: (2, 2), 12: (2, 3),
-                     13: (3, 0), 14: (3, 1), 15: (3, 2), 0: (3, 3)}
+def tileTable(cost, goalPosition=GOAL_POSITION):
+    """
+    Precomputes a per-tile table for a heuristic that is a sum of independent
+    per-tile terms: table[tile][cell] = cost(goal, row, col) for a tile whose
+    target is goal = goalPosition[tile] lying on cell row * 4 + col.  The blank
+    (tile 0) contributes nothing.  Passing another goalPosition builds the
+    same heuristic towards a different target board.
+    """
+    return [[0] * 16] + [[cost(goalPosition[tile], cell // 4, cell % 4) for cell in range(16)]
+                         for tile in range(1, 16)]
 
-    return sum(
-        sqrt((goal_position[state.cells[row][col]][0] - row) ** 2 +
-             (goal_position[state.cells[row][col]][1] - col) ** 2)
-        for row in range(4) for col in range(4) if state.cells[row][col] != 0
-    )
 
+def tilePositions(state):
+    """
+    Returns the {tile: (row, col)} positions of a board, for use as the
+    goalPosition of tileTable.
+    """
+    return {tile: divmod(cell, 4) for cell, tile in enumerate(packedboard.unpack(state.board))}
 
-def h3(state, problem=None):
-    goal_position = {1: (0, 0), 2: (0, 1), 3: (0, 2), 4: (0, 3),
-                     5: (1, 0), 6: (1, 1), 7: (1, 2), 8: (1, 3),
-                     9: (2, 0), 10: (2, 1), 11: (2, 2), 12: (2, 3),
-                     13: (3, 0), 14: (3, 1), 15: (3, 2), 0: (3, 3)}
 
-    return sum(
-        abs(goal_position[state.cells[row][col]][0] - row) + abs(goal_position[state.cells[row][col]][1] - col)
-        for row in range(4) for col in range(4) if state.cells[row][col] != 0
-    )
+def _misplaced(goal, row, col):
+    return int(goal != (row, col))
 
 
-def h4(state, problem=None):
-    goal_position = {1: (0, 0), 2: (0, 1), 3: (0, 2), 4: (0, 3),
-                     5: (1, 0), 6: (1, 1), 7: (1, 2), 8: (1, 3),
-                     9: (2, 0), 10: (2, 1), 11: (2, 2), 12: (2, 3),
-                     13: (3, 0), 14: (3, 1), 15: (3, 2), 0: (3, 3)}
+def _euclidean(goal, row, col):
+    return sqrt((goal[0] - row) ** 2 + (goal[1] - col) ** 2)
+
+
+def _manhattan(goal, row, col):
+    return abs(goal[0] - row) + abs(goal[1] - col)
+
+
+def _outOfRowAndColumn(goal, row, col):
+    return int(goal[0] != row) + int(goal[1] != col)
+
 
-    out_of_row = sum(1 for row in range(4) for col in range(4)
-                     if state.cells[row][col] != 0 and goal_position[state.cells[row][col]][0] != row)
-    out_of_col = sum(1 for row in range(4) for col in range(4)
-                     if state.cells[row][col] != 0 and goal_position[state.cells[row][col]][1] != col)
+def _manhattanPlusOutOfRowAndColumn(goal, row, col):
+    return _manhattan(goal, row, col) + _outOfRowAndColumn(goal, row, col)
 
-    return out_of_row + out_of_col
+
+MISPLACED_TABLE = tileTable(_misplaced)
+EUCLIDEAN_TABLE = tileTable(_euclidean)
+MANHATTAN_TABLE = tileTable(_manhattan)
+OUT_OF_ROW_AND_COLUMN_TABLE = tileTable(_outOfRowAndColumn)
+MANHATTAN_PLUS_OUT_OF_LINE_TABLE = tileTable(_manhattanPlusOutOfRowAndColumn)
+
+
+def tableHeuristic(state, table):
+    """
+    Evaluates a per-tile table heuristic by scanning the 16 cells of the board.
+    """
+    return sum(table[tile][cell] for cell, tile in enumerate(packedboard.unpack(state.board)))
+
+
+def h1(state, problem=None):
+    return tableHeuristic(state, MISPLACED_TABLE)
+
+
+def h2(state, problem=None):
+    return tableHeuristic(state, EUCLIDEAN_TABLE)
+
+
+def h3(state, problem=None):
+    return tableHeuristic(state, MANHATTAN_TABLE)
+
+
+def h4(state, problem=None):
+    return tableHeuristic(state, OUT_OF_ROW_AND_COLUMN_TABLE)
 
 
 # this is a custom heuristic 5 that combines the h3 manhatan distance for the early stage of the problem and the h4
@@ -293,61 +822,1010 @@ def h4(state, problem=None):
 
 
 def h5(state, problem=None):
-    goal_position = {1: (0, 0), 2: (0, 1), 3: (0, 2), 4: (0, 3),
-                     5: (1, 0), 6: (1, 1), 7: (1, 2), 8: (1, 3),
-                     9: (2, 0), 10: (2, 1), 11: (2, 2), 12: (2, 3),
-                     13: (3, 0), 14: (3, 1), 15: (3, 2), 0: (3, 3)}
+    return tableHeuristic(state, MANHATTAN_PLUS_OUT_OF_LINE_TABLE)
+
+
+def _lineConflicts(values):
+    """
+    Returns the linear conflict penalty of one row or column and bitmasks of
+    the cells of the line, numbered along a row and down a column of the
+    board, holding tiles reversed with another tile.  values gives, for each
+    cell of the line, 0 for the blank or a tile whose goal is on another line
+    and 1 + the tile's goal index along the line otherwise.  Every tile left
+    out of a longest increasing run of goal indices has to step off the line
+    and back, two moves Manhattan distance does not count.
+    """
+    goals = [(cell, value) for cell, value in enumerate(values) if value]
+    longest = []
+    for index, (_, value) in enumerate(goals):
+        longest.append(1 + max((longest[other] for other in range(index) if goals[other][1] < value), default=0))
+    rowMask = 0
+    for index, (cell, value) in enumerate(goals):
+        for otherCell, otherValue in goals[index + 1:]:
+            if otherValue < value:
+                rowMask |= 1 << cell | 1 << otherCell
+    columnMask = sum(1 << (4 * cell) for cell in range(4) if rowMask >> cell & 1)
+    return 2 * (len(goals) - max(longest, default=0)), rowMask, columnMask
+
+
+# Conflicts of every filling of a line, indexed by its values read as base-5 digits
+LINE_CONFLICTS = tuple(_lineConflicts(values) for values in itertools.product(range(5), repeat=4))
+
+
+def _linearConflictTerm(goal, row, col):
+    """
+    The term of a tile on a cell in LINEAR_CONFLICT_TABLE: its Manhattan
+    distance in the low 7 bits and, above them, its base-5 digit in the
+    LINE_CONFLICTS index of its row and of its column.  The line indices of
+    the whole board are then base-625 digits of the sum of the terms, rows
+    0-3 first and columns 0-3 after them.
+    """
+    rowDigit = (goal[1] + 1) * 5 ** (3 - col) if goal[0] == row else 0
+    columnDigit = (goal[0] + 1) * 5 ** (3 - row) if goal[1] == col else 0
+    return _manhattan(goal, row, col) + ((rowDigit * 625 ** row + columnDigit * 625 ** (4 + col)) << 7)
+
+
+LINEAR_CONFLICT_TABLE = tileTable(_linearConflictTerm)
+# Goal corner cell, its tile and the two cells beside it, with their tiles
+CORNERS = ((0, 1, ((1, 2), (4, 5))), (3, 4, ((2, 3), (7, 8))), (12, 13, ((8, 9), (13, 14))))
+
+
+def h6(state, problem=None):
+    """
+    Manhattan distance plus linear conflicts, corner tiles and last moves, all
+    admissible.  The linear conflicts of each row and column come from
+    LINE_CONFLICTS.  A corner tile away from its corner while both tiles
+    beside the corner are home forces one of those to step away and back,
+    and the last move brings tile 12 or tile 15 home from the bottom-right
+    cell, so if neither is on the line leading there one takes a detour.
+    Each of these two extra moves is only counted when the tiles that would
+    make them are reversed with no other tile, so that no move is counted
+    twice.  A move can lower the value by 3, so h6 is not consistent (see
+    INCONSISTENT_HEURISTICS).
+    """
+    tiles = packedboard.unpack(state.board)
+    terms = sum(LINEAR_CONFLICT_TABLE[tile][cell] for cell, tile in enumerate(tiles))
+    h = terms & 127
+    if not h:
+        return 0
+
+    lines = terms >> 7
+    conflicted = 0  # Cells of tiles reversed in their row or column
+    for row in range(4):
+        lines, line = divmod(lines, 625)
+        penalty, rowMask, _ = LINE_CONFLICTS[line]
+        h += penalty
+        conflicted |= rowMask << (4 * row)
+    for col in range(4):
+        lines, line = divmod(lines, 625)
+        penalty, _, columnMask = LINE_CONFLICTS[line]
+        h += penalty
+        conflicted |= columnMask << col
+
+    for corner, tile, beside in CORNERS:
+        if tiles[corner] != tile and all(tiles[cell] == home and not conflicted >> cell & 1 for cell, home in beside):
+            h += 2
+
+    cell12, cell15 = tiles.index(12), tiles.index(15)
+    if cell12 // 4 != 3 and cell15 % 4 != 3 and not conflicted >> cell12 & 1 and not conflicted >> cell15 & 1:
+        h += 2
+    return h
+
+
+# Overridden by the WALKING_DISTANCE_CACHE environment variable; empty keeps the table in memory only
+WALKING_DISTANCE_CACHE = os.environ.get('WALKING_DISTANCE_CACHE',
+                                        os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                     'walking_distance.pickle'))
+_walkingDistances = None
+
+
+def _walkingDistanceTerm(goal, row, col):
+    """
+    The term of a tile on a cell in WALKING_DISTANCE_TABLE.  A board is
+    summarised by a vertical key, 3 bits for each (row, goal row) pair
+    counting the tiles in that row whose goal is in that goal row, and a
+    horizontal key counting columns and goal columns the same way.  The
+    horizontal key lies above bit 48 of the sum of the terms.
+    """
+    return 1 << 3 * (4 * row + goal[0]) | 1 << 48 + 3 * (4 * col + goal[1])
+
+
+WALKING_DISTANCE_TABLE = tileTable(_walkingDistanceTerm)
+_WALKING_KEY_MASK = (1 << 48) - 1
+_WALKING_GOAL_KEY = sum(4 - (row == 3) << 3 * (4 * row + row) for row in range(4))
+_WALKING_KEY_COUNT = 24964  # Vertical keys reachable from the goal
+
+
+def _buildWalkingDistances():
+    """
+    Breadth-first search from the goal over vertical keys (see
+    _walkingDistanceTerm).  Moving the blank up or down carries a tile of the
+    row it enters into the blank's row, so a tile of any goal row present in
+    that row can move.  Returns {key: least number of vertical moves}.
+    """
+    distances = {_WALKING_GOAL_KEY: 0}
+    layer = [(_WALKING_GOAL_KEY, 3)]  # (key, blank row)
+    while layer:
+        nextLayer = []
+        for key, blankRow in layer:
+            distance = distances[key] + 1
+            for row in (blankRow - 1, blankRow + 1):
+                if not 0 <= row < 4:
+                    continue
+                for goalRow in range(4):
+                    if key >> 3 * (4 * row + goalRow) & 7:
+                        child = key - (1 << 3 * (4 * row + goalRow)) + (1 << 3 * (4 * blankRow + goalRow))
+                        if child not in distances:
+                            distances[child] = distance
+                            nextLayer.append((child, row))
+        layer = nextLayer
+    return distances
+
+
+def _loadWalkingDistances(cache):
+    """
+    Returns the table pickled in cache, raising ValueError unless it maps
+    every vertical key to an int distance.
+    """
+    with open(cache, 'rb') as file:
+        distances = pickle.load(file)
+    if (not isinstance(distances, dict) or len(distances) != _WALKING_KEY_COUNT
+            or distances.get(_WALKING_GOAL_KEY) != 0
+            or not all(type(key) is int and type(distance) is int for key, distance in distances.items())):
+        raise ValueError(f"{cache} does not hold a walking distance table.")
+    return distances
+
+
+def walkingDistances(cache=None):
+    """
+    Returns the {vertical key: distance} table of the walking distance
+    heuristic, loaded from cache (WALKING_DISTANCE_CACHE by default) or
+    built and saved there on first use.  A missing, corrupt or incompatible
+    cache is rebuilt; if it cannot be written, as in a read-only install, or
+    cache is empty, the table is only kept in memory.
+    """
+    global _walkingDistances
+    if _walkingDistances is None:
+        cache = WALKING_DISTANCE_CACHE if cache is None else cache
+        try:
+            _walkingDistances = _loadWalkingDistances(cache) if cache else None
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            pass
+        if _walkingDistances is None:
+            _walkingDistances = _buildWalkingDistances()
+            if cache:
+                try:
+                    with util.atomicWrite(cache) as file:
+                        pickle.dump(_walkingDistances, file)
+                except OSError:
+                    pass  # The table stays in memory and is rebuilt by the next process
+    return _walkingDistances
+
+
+def walkingDistance(keys):
+    """
+    Returns the walking distance of a board from the sum of its
+    WALKING_DISTANCE_TABLE terms.  By transposing the board, the columns of
+    a board are the rows of another one with the same goal blank cell, so
+    one table serves both keys.
+    """
+    distances = _walkingDistances or walkingDistances()
+    return distances[keys & _WALKING_KEY_MASK] + distances[keys >> 48]
+
+
+def h7(state, problem=None):
+    """
+    Walking distance: the fewest vertical moves that bring every tile to its
+    goal row, counting only how many tiles of each goal row every row holds,
+    plus the same count for columns.  Each move is either vertical or
+    horizontal, so the sum is admissible and consistent, and it is never
+    below Manhattan distance.  A move changes the keys by one tile's terms,
+    so searches update it like the heuristics of HEURISTIC_TABLES (see
+    TERM_HEURISTICS).
+    """
+    return walkingDistance(tableHeuristic(state, WALKING_DISTANCE_TABLE))
+
 
-    # Manhattan distance (h3)
-    manhattan_distance = sum(
-        abs(goal_position[state.cells[row][col]][0] - row) + abs(goal_position[state.cells[row][col]][1] - col)
-        for row in range(4) for col in range(4) if state.cells[row][col] != 0
-    )
+# Heuristics with integer per-tile tables.  A single move changes one tile's
+# term only, so searches can update these from the parent's value instead of
+# rescanning the board (h2 is left out: its float terms would drift).
+HEURISTIC_TABLES = {
+    h1: MISPLACED_TABLE,
+    h3: MANHATTAN_TABLE,
+    h4: OUT_OF_ROW_AND_COLUMN_TABLE,
+    h5: MANHATTAN_PLUS_OUT_OF_LINE_TABLE,
+}
 
-    # Out of row/column (h4)
-    out_of_row = sum(1 for row in range(4) for col in range(4)
-                     if state.cells[row][col] != 0 and goal_position[state.cells[row][col]][0] != row)
-    out_of_col = sum(1 for row in range(4) for col in range(4)
-                     if state.cells[row][col] != 0 and goal_position[state.cells[row][col]][1] != col)
+# Heuristics computed from a sum of per-tile terms that searches update like
+# those of HEURISTIC_TABLES: heuristic -> (term table, function of the sum)
+TERM_HEURISTICS = {
+    h7: (WALKING_DISTANCE_TABLE, walkingDistance),
+}
 
-    return manhattan_distance + (out_of_row + out_of_col)
+# Admissible heuristics that can drop by more than a move's cost from one state
+# to the next; aStarSearch reopens closed states for them to stay optimal.
+# Heuristics made at run time, such as those of patterndb, say so with an
+# 'inconsistent' attribute instead (see _isInconsistent).
+INCONSISTENT_HEURISTICS = {h6}
 
 
-def aStarSearch(problem, heuristic):
-    frontier = util.PriorityQueue()
-    fringe_size = 0
+def _isInconsistent(heuristic):
+    return heuristic in INCONSISTENT_HEURISTICS or getattr(heuristic, 'inconsistent', False)
+
+
+def _derivation(heuristic):
+    """
+    Returns the (derive, summarize) pair of a heuristic that evaluates a
+    successor from the values computed for its parent, such as the modulo-3
+    pattern databases of patterndb, or None.  Such a heuristic carries the
+    pair as its 'derive' attribute: derive(state, parentValues or None)
+    returns the state's values and summarize(values) its h.
+    """
+    return getattr(heuristic, 'derive', None)
+
+# Per-tile cost functions behind h1-h5, used to rebuild a heuristic towards a
+# target other than the goal (see bidirectionalAStarSearch).
+TILE_COSTS = {
+    h1: _misplaced,
+    h2: _euclidean,
+    h3: _manhattan,
+    h4: _outOfRowAndColumn,
+    h5: _manhattanPlusOutOfRowAndColumn,
+}
+
+
+def aStarSearch(problem, heuristic, weight=1, deadline=None, maxNodes=None):
+    """
+    Search the node of least cost plus heuristic first.  A weight above 1
+    turns this into weighted A*, ordering nodes by g + weight * h (see
+    weightedAStarSearch).
+
+    Every reached state has a single entry in a transposition table, keyed
+    by its packed board and holding one int that packs its g-value, a closed
+    flag and the action that reached it (see _MOVE_BITS).  The open list
+    holds (state, g, heuristic, depth, pruning machine state) entries; a
+    state reached again more cheaply is pushed again, and the entry it
+    supersedes is skipped when popped (lazy deletion).  Closed states are
+    only reopened for inconsistent heuristics (see INCONSISTENT_HEURISTICS),
+    and heuristics with a 'derive' attribute (see _derivation) carry their
+    values along with the node to derive those of its successors.  Step costs
+    must be integers, and the path is rebuilt from the table through
+    problem.getPredecessors, or through a dict of parent keys for problems
+    without it.
+
+    Problems with getPrunedSuccessors do not generate the move undoing the
+    previous one, which always leads back to a closed state.  Longer
+    duplicate move sequences are left to the table, since pruning them as
+    well could discard the only path the table would still accept.
+
+    The max fringe size is the peak number of states in the open list, not
+    counting such stale entries.  With util.SearchStats.detailed set,
+    heuristics updated incrementally are timed as part of successor
+    generation, and stats.memory estimates the bytes held by each structure
+    at its peak (see _aStarMemory), stale entries included.
+    """
+    stats = util.SearchStats()
+    detailed = stats.detailed
+    clock = time.perf_counter_ns
+    if detailed:
+        stats.timePhases('generation_ns', 'heuristic_ns', 'queue_ns')
+    budget = util.SearchBudget.create(deadline, maxNodes)
+    fringe_size = 1
+    openStates = 1  # States with a live open list entry; stale entries are not counted
+    peakEntries = 1  # Open list entries, stale ones included, for the memory estimate
     depth = 0
-    exploredNodes = set()  # Changed to set for O(1) lookup
+    nodes_expanded = 0
     startState = problem.getStartState()
-    startNode = (startState, [], 0)  # (state, action, cost)
 
+    # Heuristics with a per-tile table are carried along with each node and updated
+    # incrementally by the problem; any other heuristic is evaluated per successor.
+    # For TERM_HEURISTICS the node carries the sum of terms, and summarize turns it
+    # into the heuristic value.
+    heuristicTable, summarize = TERM_HEURISTICS.get(heuristic, (HEURISTIC_TABLES.get(heuristic), None))
+    incremental = heuristicTable is not None and hasattr(problem, 'getHeuristicSuccessors')
+    if not incremental:
+        summarize = None
+    derive = None
+    if _derivation(heuristic) is not None:
+        derive, summarize = _derivation(heuristic)
+    pruning = hasattr(problem, 'getPrunedSuccessors')
+    transitions = movepruning.machine(2)
+    reopen = _isInconsistent(heuristic)
+    if derive is None:
+        startHeuristic = heuristic(startState, problem)
+        startCarried = startHeuristic if summarize is None else tableHeuristic(startState, heuristicTable)
+    else:
+        startCarried = derive(startState, None)
+        startHeuristic = summarize(startCarried)
+    # Integer f-values go into a bucket queue that pops the deepest node among equal f;
+    # float heuristics such as h2 keep the binary heap
+    useBuckets = isinstance(startHeuristic, int) and isinstance(weight, int)
+    frontier = util.BucketPriorityQueue() if useBuckets else util.PriorityQueue()
+    startNode = (startState, 0, startCarried, 0, movepruning.START)  # (state, cost, heuristic, depth, machine state)
     frontier.push(startNode, 0)
-    # Track costs to reach states that have been seen
-    seenStates = {startState: 0}
 
-    while not frontier.isEmpty():
-        currentState, actions, currentCost = frontier.pop()
+    packed = hasattr(startState, 'board')
+    table = {_tableKey(startState): 0}
+    parents = None if _implements(problem, 'getPredecessors') else {}  # Key -> parent key
+    moves, moveCodes = [], {}  # Actions by the index stored in the table, and the reverse
+
+    def finish(solution, bf):
+        if detailed:
+            stats.memory = _aStarMemory(table, peakEntries, startNode)
+        return stats.finish(solution, nodes_expanded, fringe_size, bf, nodes_expanded)
 
-        if currentState in exploredNodes:
+    while not frontier.isEmpty():
+        if detailed:
+            started = clock()
+            currentNode = frontier.pop()
+            stats.queue_ns += clock() - started
+        else:
+            currentNode = frontier.pop()
+        currentState, currentCost, currentHeuristic, currentDepth, currentMachineState = currentNode
+        currentKey = currentState.board if packed else currentState
+        entry = table[currentKey]
+
+        if entry & _CLOSED or currentCost > entry >> (_MOVE_BITS + 1):
+            if detailed:
+                stats.duplicates_pruned += 1  # Stale entry of a state expanded or reached more cheaply since
             continue
 
-        exploredNodes.add(currentState)
-        fringe_size = max(frontier.count, fringe_size)
+        if budget is not None:
+            reason = budget.exceeded(nodes_expanded)
+            if reason:
+                stats.peak_closed_size = nodes_expanded
+                if detailed:
+                    stats.memory = _aStarMemory(table, peakEntries, startNode)
+                bestF = currentCost + (currentHeuristic if summarize is None else summarize(currentHeuristic))
+                return util.BudgetExceeded(reason, [], nodes_expanded, fringe_size, bestF, stats)
+        table[currentKey] = entry | _CLOSED
+        openStates -= 1
+        nodes_expanded += 1
         if problem.isGoalState(currentState):
-            bf = branching_factor(depth, len(exploredNodes))
-            return actions, len(exploredNodes), fringe_size, bf
-
-        for succState, succAction, succCost in problem.getSuccessors(currentState):
-            newAction = actions + [succAction]
-            depth = max(depth, len(actions))
+            actions = reconstructPath(problem, table, moves, startState, currentState, parents)
+            return finish(actions, branching_factor(depth, nodes_expanded))
+
+        depth = max(depth, currentDepth)
+        if detailed:
+            started = clock()
+        if pruning:
+            successors = problem.getPrunedSuccessors(currentState, currentMachineState, transitions,
+                                                     currentHeuristic, heuristicTable if incremental else None)
+        elif incremental:
+            successors = [(succState, succAction, succCost, succHeuristic, None)
+                          for succState, succAction, succCost, succHeuristic
+                          in problem.getHeuristicSuccessors(currentState, currentHeuristic, heuristicTable)]
+        else:
+            successors = [(succState, succAction, succCost, None, None)
+                          for succState, succAction, succCost in problem.getSuccessors(currentState)]
+        if detailed:
+            stats.generation_ns += clock() - started
+            stats.nodes_generated += len(successors)
+
+        for succState, succAction, succCost, succHeuristic, succMachineState in successors:
             newCost = currentCost + succCost
+            succKey = succState.board if packed else succState
+            succEntry = table.get(succKey)
 
             # Only process new state or better cost found
-            if succState not in seenStates or newCost < seenStates[succState]:
-                seenStates[succState] = newCost
-                frontier.push((succState, newAction, newCost), newCost + heuristic(succState, problem))
+            if succEntry is not None:
+                if newCost >= succEntry >> (_MOVE_BITS + 1) or (succEntry & _CLOSED and not reopen):
+                    if detailed:
+                        stats.duplicates_pruned += 1
+                    continue
+                if succEntry & _CLOSED:
+                    stats.reopenings += 1
+                    openStates += 1
+            else:
+                openStates += 1
+            code = moveCodes.get(succAction)
+            if code is None:
+                if len(moves) > _MOVE_MASK:
+                    raise ValueError(f"aStarSearch supports at most {_MOVE_MASK + 1} distinct actions.")
+                code = moveCodes[succAction] = len(moves)
+                moves.append(succAction)
+            table[succKey] = newCost << (_MOVE_BITS + 1) | code
+            if parents is not None:
+                parents[succKey] = currentKey
+
+            if succHeuristic is None:
+                if detailed:
+                    started = clock()
+                if derive is None:
+                    succHeuristic = heuristic(succState, problem)
+                else:
+                    succHeuristic = derive(succState, currentHeuristic)
+                if detailed:
+                    stats.heuristic_ns += clock() - started
+            succValue = succHeuristic if summarize is None else summarize(succHeuristic)
+            newNode = (succState, newCost, succHeuristic, currentDepth + 1, succMachineState)
+            if detailed:
+                started = clock()
+            if useBuckets:
+                frontier.push(newNode, newCost + weight * succValue, currentDepth + 1)
+            else:
+                frontier.push(newNode, newCost + weight * succValue)
+            if detailed:
+                stats.queue_ns += clock() - started
+        fringe_size = max(fringe_size, openStates)
+        if detailed:
+            peakEntries = max(peakEntries, len(frontier))
+
+    # Return empty path if not found
+    return finish([], 0)
+
+
+def weightedAStarSearch(problem, heuristic, weight=2, deadline=None, maxNodes=None):
+    """
+    Weighted A*: orders nodes by g + weight * h.  With an admissible heuristic
+    the solution costs at most weight times the optimal cost, and usually far
+    fewer nodes are expanded than with plain A*.
+    """
+    return aStarSearch(problem, heuristic, weight, deadline, maxNodes)
 
-    return [], len(exploredNodes), fringe_size, 0  # Return empty path if not found
 
+def anytimeAStarSearch(problem, heuristic, initialWeight=3, weightStep=0.5, deadline=None, maxNodes=None,
+                       verbose=True):
+    """
+    Anytime Repairing A* (ARA*): a weighted A* with weight initialWeight finds
+    a first solution quickly, then the weight is lowered by weightStep and the
+    search is repaired rather than restarted -- states whose cost improved
+    after being expanded are kept aside and reopened with the new weight --
+    until the weight reaches 1 and the solution is optimal.
+
+    After each solution the suboptimality bound min(weight, cost / min g + h
+    over the states still open or set aside) is known: the solution costs at
+    most that many times the optimum when the heuristic is admissible.  The
+    search also stops with its best solution so far once time.monotonic()
+    passes deadline or maxNodes nodes were expanded, or with a
+    util.BudgetExceeded outcome if it has none.  With verbose set, every
+    solution is printed together with its bound.
+
+    Returns the same (actions, nodes expanded, max fringe size, branching
+    factor) tuple as aStarSearch for the best solution found, with the bound
+    of that solution in stats.bound: the weight of the last completed
+    iteration, lowered by the open states when the budget cut the next one
+    short, and 1 once the weight reached 1.
+    """
+    stats = util.SearchStats()
+    detailed = stats.detailed
+    budget = util.SearchBudget.create(deadline, maxNodes)
+    startState = problem.getStartState()
+    heuristicValues = {}
+
+    def h(state):
+        if state not in heuristicValues:
+            heuristicValues[state] = heuristic(state, problem)
+        return heuristicValues[state]
+
+    weight = initialWeight
+    costs = {startState: 0}
+    parents = {startState: None}  # state -> (parent state, action)
+    frontier = util.IndexedPriorityQueue()
+    frontier.push(startState, weight * h(startState))
+    closed = set()
+    inconsistent = set()  # Closed states whose cost improved, reopened at the next weight
+    goalState = startState if problem.isGoalState(startState) else None
+    best = None
+    nodes_expanded = 0
+    max_fringe_size = 1
+    stopReason = None
+    bestF = 0  # Highest unweighted f expanded so far
+
+    def improvePath():
+        nonlocal goalState, nodes_expanded, max_fringe_size, stopReason, bestF
+        while not frontier.isEmpty():
+            if goalState is not None and costs[goalState] <= frontier.minimumPriority():
+                return True
+            if budget is not None:
+                stopReason = budget.exceeded(nodes_expanded)
+                if stopReason:
+                    return False
+            state = frontier.pop()
+            closed.add(state)
+            nodes_expanded += 1
+            bestF = max(bestF, costs[state] + h(state))
+
+            for succState, succAction, succCost in problem.getSuccessors(state):
+                newCost = costs[state] + succCost
+                if detailed:
+                    stats.nodes_generated += 1
+                if succState in costs and costs[succState] <= newCost:
+                    if detailed:
+                        stats.duplicates_pruned += 1
+                    continue
+                costs[succState] = newCost
+                parents[succState] = (state, succAction)
+                if problem.isGoalState(succState) and (goalState is None or newCost <= costs[goalState]):
+                    goalState = succState
+                if succState in closed:
+                    inconsistent.add(succState)
+                else:
+                    frontier.update(succState, newCost + weight * h(succState))
+            max_fringe_size = max(max_fringe_size, len(frontier) + len(inconsistent))
+            stats.peak_closed_size = max(stats.peak_closed_size, len(closed))
+        return goalState is not None
+
+    def suboptimalityBound(limit):
+        # Every open or set-aside g + h is a lower bound on the optimal cost
+        lowerBound = min((costs[state] + h(state) for state in list(frontier.index) + list(inconsistent)),
+                         default=best[1])
+        return min(limit, best[1] / lowerBound) if lowerBound > 0 else limit
+
+    bound = math.inf  # Suboptimality bound of the best solution so far
+    while True:
+        completed = improvePath()
+        if goalState is not None and (best is None or costs[goalState] < best[1]):
+            actions, state = [], goalState
+            while parents[state] is not None:
+                state, action = parents[state]
+                actions.append(action)
+            best = (actions[::-1], costs[goalState])
+        if best is None:
+            break
+        if not completed:
+            # Cut short: the weight holds no bound, but the last completed one still does
+            bound = suboptimalityBound(bound)
+            if verbose:
+                print(f"ARA* stopped: cost {best[1]}, suboptimality bound {bound:.3f}")
+            break
+
+        bound = suboptimalityBound(min(weight, bound))
+        if verbose:
+            print(f"ARA* solution: cost {best[1]}, weight {weight}, suboptimality bound {bound:.3f}")
+        if bound <= 1 or weight <= 1:
+            break
+
+        # Lower the weight and repair: reopen the set-aside states and re-key the open ones
+        weight = max(1, weight - weightStep)
+        reopened = list(frontier.index) + list(inconsistent)
+        frontier = util.IndexedPriorityQueue()
+        for state in reopened:
+            frontier.push(state, costs[state] + weight * h(state))
+        stats.reopenings += len(inconsistent)
+        closed.clear()
+        inconsistent.clear()
+
+    if best is None:
+        if stopReason:
+            return util.BudgetExceeded(stopReason, [], nodes_expanded, max_fringe_size, bestF, stats)
+        return stats.finish([], nodes_expanded, max_fringe_size, 0)  # Return empty path if not found
+    stats.bound = bound
+    bf = branching_factor(len(best[0]), nodes_expanded)
+    return stats.finish(best[0], nodes_expanded, max_fringe_size, bf)
+
+
+class _SMANode:
+    """
+    A node of smaStarSearch's in-memory search tree.  'successors' is filled
+    on the first expansion and generated one at a time from 'nextSuccessor';
+    'forgotten' maps the states of evicted children to their backed-up f.
+    """
+
+    __slots__ = ('state', 'parent', 'action', 'depth', 'g', 'f', 'successors', 'nextSuccessor', 'children',
+                 'forgotten', 'version')
 
+    def __init__(self, state, parent, action, depth, g, f):
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.depth = depth
+        self.g = g
+        self.f = f
+        self.successors = None
+        self.nextSuccessor = 0
+        self.children = {}
+        self.forgotten = {}
+        self.version = 0  # Bumped whenever the node's heap entries go stale
 
+
+def smaStarSearch(problem, heuristic, memoryLimit=100000, verbose=True, deadline=None, maxNodes=None):
+    """
+    Simplified memory-bounded A* (SMA*): best-first search that never keeps
+    more than memoryLimit nodes in memory.  The deepest least-f node generates
+    one successor at a time; once memory is full, the shallowest highest-f
+    leaf is evicted and its f-value is backed up into its parent, which is
+    reopened so that the forgotten branch can be regenerated if it becomes
+    the most promising again.  The result is optimal whenever the optimal
+    path fits in the budget (depth below memoryLimit).  States repeated along a
+    path are pruned.
+
+    Returns the same (actions, nodes expanded, max fringe size, branching
+    factor) tuple as aStarSearch; the peak closed size counts the nodes held
+    in memory outside the open list, and stats.peak_nodes all of them.  With
+    verbose set, the peak number of nodes held in memory is printed.
+
+    memoryLimit must leave room for the root and one child, so it is at
+    least 2; a ValueError is raised otherwise.
+    """
+    if memoryLimit < 2:
+        raise ValueError(f"smaStarSearch needs a memoryLimit of at least 2, got {memoryLimit}.")
+    stats = util.SearchStats()
+    budget = util.SearchBudget.create(deadline, maxNodes)
+    startState = problem.getStartState()
+    root = _SMANode(startState, None, None, 0, 0, heuristic(startState, problem))
+    openNodes = set()
+    expandHeap, evictHeap = [], []  # Lazily cleaned: (f, -depth, ...) and (-f, depth, ...)
+    sequence = 0
+    nodesInMemory = peak_nodes = stats.peak_nodes = 1
+    nodes_expanded = 0
+    max_fringe_size = 1
+
+    def enqueue(node):
+        # A node is ranked by the f of the successor it would generate next
+        nonlocal sequence
+        if node.successors is None or node.nextSuccessor < len(node.successors):
+            f = node.f
+        else:
+            f = min(node.forgotten.values(), default=math.inf)
+        node.version += 1
+        openNodes.add(node)
+        sequence += 1
+        heapq.heappush(expandHeap, (f, -node.depth, sequence, node.version, node))
+        heapq.heappush(evictHeap, (-f, node.depth, sequence, node.version, node))
+
+    def compactHeaps():
+        # Stale entries are dropped lazily; rebuild both heaps if they pile up
+        nonlocal expandHeap, evictHeap
+        if len(expandHeap) + len(evictHeap) > 8 * memoryLimit + 64:
+            expandHeap, evictHeap = [], []
+            for node in list(openNodes):
+                enqueue(node)
+
+    def evictWorstLeaf(best):
+        # Returns False, evicting nothing, when no leaf but best and the root is held
+        nonlocal nodesInMemory
+        skipped = leaf = None
+        while evictHeap:
+            entry = heapq.heappop(evictHeap)
+            candidate = entry[4]
+            if (candidate not in openNodes or candidate.version != entry[3] or candidate.children
+                    or candidate.parent is None):
+                continue
+            if candidate is best:
+                skipped = entry
+                continue
+            leaf = candidate
+            break
+        if skipped is not None:
+            heapq.heappush(evictHeap, skipped)
+        if leaf is None:
+            return False
+
+        parent = leaf.parent
+        del parent.children[leaf.state]
+        parent.forgotten[leaf.state] = leaf.f
+        openNodes.discard(leaf)
+        nodesInMemory -= 1
+        enqueue(parent)  # The parent must regenerate the forgotten child later
+        backup(parent)
+        return True
+
+    def backup(node):
+        # A fully generated node is worth its best child, forgotten or not; propagate changes upwards
+        while node is not None and node.nextSuccessor == len(node.successors):
+            newF = min(min((child.f for child in node.children.values()), default=math.inf),
+                       min(node.forgotten.values(), default=math.inf))
+            if newF == node.f:
+                break
+            node.f = newF
+            if node in openNodes:
+                enqueue(node)
+            node = node.parent
+
+    enqueue(root)
+    while openNodes:
+        entry = heapq.heappop(expandHeap)
+        best = entry[4]
+        if best not in openNodes or best.version != entry[3]:
+            continue
+        if entry[0] == math.inf:
+            break
+        if budget is not None:
+            reason = budget.exceeded(nodes_expanded)
+            if reason:
+                return util.BudgetExceeded(reason, [], nodes_expanded, max_fringe_size, entry[0], stats)
+
+        nodes_expanded += 1
+        if problem.isGoalState(best.state):
+            actions, node = [], best
+            while node.parent is not None:
+                actions.append(node.action)
+                node = node.parent
+            actions.reverse()
+            if verbose:
+                print(f"SMA*: peak nodes in memory {peak_nodes} of {memoryLimit}")
+            bf = branching_factor(len(actions), nodes_expanded)
+            return stats.finish(actions, nodes_expanded, max_fringe_size, bf)
+
+        if best.successors is None:
+            ancestors, node = set(), best.parent
+            while node is not None:
+                ancestors.add(node.state)
+                node = node.parent
+            successors = problem.getSuccessors(best.state)
+            best.successors = [successor for successor in successors if successor[0] not in ancestors]
+            stats.duplicates_pruned += len(successors) - len(best.successors)
+
+        # Generate the next successor not in memory: a new one, or else the best forgotten one
+        if best.nextSuccessor < len(best.successors):
+            succState, succAction, succCost = best.successors[best.nextSuccessor]
+            best.nextSuccessor += 1
+            g = best.g + succCost
+            if problem.isGoalState(succState):
+                f = max(best.f, g)
+            elif best.depth + 2 >= memoryLimit:
+                f = math.inf  # Too deep for its own successors to fit in memory
+            else:
+                f = max(best.f, g + heuristic(succState, problem))
+        elif best.forgotten:
+            succState = min(best.forgotten, key=best.forgotten.get)
+            f = best.forgotten.pop(succState)
+            succAction, succCost = next((action, cost) for state, action, cost in best.successors
+                                        if state == succState)
+            g = best.g + succCost
+        else:
+            # Dead end: nothing to generate
+            best.f = math.inf
+            enqueue(best)
+            if best.parent is not None:
+                backup(best.parent)
+            continue
+
+        if nodesInMemory >= memoryLimit and not evictWorstLeaf(best):
+            break  # No room for the successor: no solution within memoryLimit
+        child = _SMANode(succState, best, succAction, best.depth + 1, g, f)
+        best.children[succState] = child
+        nodesInMemory += 1
+        stats.peak_nodes = peak_nodes = max(peak_nodes, nodesInMemory)
+        stats.nodes_generated += 1
+        enqueue(child)
+
+        if best.nextSuccessor == len(best.successors) and not best.forgotten:
+            openNodes.discard(best)
+            backup(best)
+        else:
+            enqueue(best)
+        max_fringe_size = max(max_fringe_size, len(openNodes))
+        stats.peak_closed_size = max(stats.peak_closed_size, nodesInMemory - len(openNodes))
+        compactHeaps()
+
+    if verbose:
+        print(f"SMA*: no solution within {memoryLimit} nodes (peak nodes in memory {peak_nodes})")
+    return stats.finish([], nodes_expanded, max_fringe_size, 0)  # Return empty path if not found
+
+
+def idaStarSearch(problem, heuristic, verbose=True, deadline=None, maxNodes=None):
+    """
+    Iterative-deepening A*: a series of depth-first searches bounded by
+    f = g + h, each one raising the bound to the smallest f that exceeded the
+    previous bound.  Only the current path is kept in memory, walked in place
+    with a FifteenPuzzleCursor, and moves that would end the path with a
+    duplicate move sequence, such as one undoing the previous move, are never
+    tried (see movepruning).
+
+    Returns the same (actions, nodes expanded, max fringe size, branching
+    factor) tuple as aStarSearch; the max fringe size is the deepest path
+    held in memory.  With verbose set, the bound and node count of every
+    iteration are printed.
+    """
+    stats = util.SearchStats()
+    detailed = stats.detailed
+    budget = util.SearchBudget.create(deadline, maxNodes)
+    table, summarize = TERM_HEURISTICS.get(heuristic, (HEURISTIC_TABLES.get(heuristic), None))
+    derive = None
+    if _derivation(heuristic) is not None:
+        derive, summarize = _derivation(heuristic)
+        table = None
+    cursor = problem.getStartState().cursor(table)
+    transitions = movepruning.machine()
+    path = []  # Move codes from the start state to the cursor
+    found = object()  # Returned up the recursion once the goal is reached
+    stopped = object()  # Returned up the recursion once the budget is spent
+    stopReason = None
+    nodes_expanded = 0
+    max_fringe_size = 0
+
+    def evaluate(parentValues):
+        """
+        Returns the cursor's h and the values its successors derive theirs
+        from, for heuristics with a derivation (see _derivation).
+        """
+        if derive is not None:
+            values = derive(cursor.state(), parentValues)
+            return summarize(values), values
+        if table is None:
+            return heuristic(cursor.state(), problem), None
+        return cursor.h if summarize is None else summarize(cursor.h), None
+
+    def boundedSearch(g, threshold, machineState, parentValues):
+        nonlocal nodes_expanded, max_fringe_size, stopReason
+        h, values = evaluate(parentValues)
+        f = g + h
+        if f > threshold:
+            return f
+        if budget is not None:
+            stopReason = budget.exceeded(nodes_expanded)
+            if stopReason:
+                return stopped
+
+        nodes_expanded += 1
+        max_fringe_size = max(max_fringe_size, g + 1)
+        if cursor.isGoal():
+            return found
+
+        nextThreshold = math.inf
+        row = transitions[machineState]
+        for _, _, _, _, code in cursor.moves():
+            if row[code] < 0:  # Duplicate move sequence
+                continue
+            if detailed:
+                stats.nodes_generated += 1
+            cursor.apply(code)
+            path.append(code)
+            t = boundedSearch(g + 1, threshold, row[code], values)
+            if t is found or t is stopped:
+                return t
+            path.pop()
+            cursor.undo(code)
+            nextThreshold = min(nextThreshold, t)
+        return nextThreshold
+
+    threshold = evaluate(None)[0]
+    while True:
+        iterationStart = nodes_expanded
+        t = boundedSearch(0, threshold, movepruning.START, None)
+        if verbose:
+            print(f"IDA* iteration: threshold {threshold}, nodes expanded {nodes_expanded - iterationStart}")
+        if t is stopped:
+            return util.BudgetExceeded(stopReason, [], nodes_expanded, max_fringe_size, threshold, stats)
+        if t is found:
+            actions = [packedboard.MOVE_NAMES[code] for code in path]
+            bf = branching_factor(len(actions), nodes_expanded)
+            return stats.finish(actions, nodes_expanded, max_fringe_size, bf)
+        if t == math.inf:
+            return stats.finish([], nodes_expanded, max_fringe_size, 0)  # Return empty path if not found
+        threshold = t
+
+
+class _MeetInTheMiddleFrontier:
+    """
+    One search direction of bidirectionalAStarSearch: the best known cost of
+    every reached state, parent pointers towards the root, the set of open
+    states and three lazily cleaned heaps ordering the open states by MM
+    priority max(f, 2g), by f and by g.
+    """
+
+    def __init__(self, root, heuristic, expand):
+        self.heuristic = heuristic
+        self.expand = expand
+        self.g = {}
+        self.parent = {root: None}  # state -> (neighbour towards the root, action)
+        self.open = set()
+        self.priorityHeap, self.fHeap, self.gHeap = [], [], []
+        self.count = 0
+        self.push(root, 0)
+
+    def push(self, state, g):
+        f = g + self.heuristic(state)
+        self.g[state] = g
+        self.open.add(state)
+        self.count += 1
+        heapq.heappush(self.priorityHeap, (max(f, 2 * g), self.count, state, g))
+        heapq.heappush(self.fHeap, (f, self.count, state, g))
+        heapq.heappush(self.gHeap, (g, self.count, state, g))
+
+    def minimum(self, heap):
+        """
+        Returns the smallest key of an open state in the heap, dropping entries
+        of states that were expanded or reached again more cheaply since.
+        """
+        while heap:
+            _, _, state, g = heap[0]
+            if state in self.open and self.g[state] == g:
+                return heap[0][0]
+            heapq.heappop(heap)
+        return math.inf
+
+    def pop(self):
+        self.minimum(self.priorityHeap)
+        state = heapq.heappop(self.priorityHeap)[2]
+        self.open.remove(state)
+        return state
+
+    def pathTo(self, state):
+        """
+        Returns the actions along the parent pointers from state to the root.
+        """
+        actions = []
+        while self.parent[state] is not None:
+            state, action = self.parent[state]
+            actions.append(action)
+        return actions
+
+
+def bidirectionalAStarSearch(problem, heuristic, deadline=None, maxNodes=None):
+    """
+    Bidirectional heuristic search in the meet-in-the-middle (MM) style: a
+    forward A* from the start and a backward one from the goal, each ordering
+    its open list by max(f, 2g) so that neither side expands a state beyond
+    the midpoint of the optimal path.  The cheapest path seen through a state
+    reached from both sides is returned once it costs no more than
+    max(C, fminF, fminB, gminF + gminB + 1), which bounds every path still
+    unexplored (the cheapest step costs 1, as in the 15-puzzle).
+
+    The backward side needs a heuristic towards the start state.  For h1-h5
+    it is the same heuristic rebuilt for that target with tileTable; other
+    heuristics search backwards with nullHeuristic, which keeps the result
+    optimal.  Needs getGoalState and getPredecessors from the problem.
+
+    Returns the same (actions, nodes expanded, max fringe size, branching
+    factor) tuple as aStarSearch.
+    """
+    if not (_implements(problem, 'getGoalState') and _implements(problem, 'getPredecessors')):
+        raise ValueError("bidirectionalAStarSearch needs getGoalState and getPredecessors from the problem.")
+    stats = util.SearchStats()
+    detailed = stats.detailed
+    budget = util.SearchBudget.create(deadline, maxNodes)
+    startState = problem.getStartState()
+    if problem.isGoalState(startState):
+        return stats.finish([], 1, 1, branching_factor(0, 1))
+
+    cost = TILE_COSTS.get(heuristic)
+    if cost is not None:
+        towardsStart = tileTable(cost, tilePositions(startState))
+        backwardHeuristic = lambda state: tableHeuristic(state, towardsStart)
+    else:
+        backwardHeuristic = lambda state: nullHeuristic(state, problem)
+
+    forward = _MeetInTheMiddleFrontier(startState, lambda state: heuristic(state, problem), problem.getSuccessors)
+    backward = _MeetInTheMiddleFrontier(problem.getGoalState(), backwardHeuristic, problem.getPredecessors)
+    bestCost, meetingState = math.inf, None
+    nodes_expanded = 0
+    max_fringe_size = 2
+
+    while forward.open and backward.open:
+        forwardPriority = forward.minimum(forward.priorityHeap)
+        backwardPriority = backward.minimum(backward.priorityHeap)
+        lowerBound = max(min(forwardPriority, backwardPriority),
+                         forward.minimum(forward.fHeap), backward.minimum(backward.fHeap),
+                         forward.minimum(forward.gHeap) + backward.minimum(backward.gHeap) + 1)
+        if bestCost <= lowerBound:
+            break
+        if budget is not None:
+            reason = budget.exceeded(nodes_expanded)
+            if reason:
+                return util.BudgetExceeded(reason, [], nodes_expanded, max_fringe_size, lowerBound, stats)
+
+        side, other = (forward, backward) if forwardPriority <= backwardPriority else (backward, forward)
+        state = side.pop()
+        nodes_expanded += 1
+        g = side.g[state]
+
+        for nextState, action, stepCost in side.expand(state):
+            newCost = g + stepCost
+            if detailed:
+                stats.nodes_generated += 1
+            if nextState in side.g and side.g[nextState] <= newCost:
+                if detailed:
+                    stats.duplicates_pruned += 1
+                continue
+            if nextState in side.g and nextState not in side.open:
+                stats.reopenings += 1
+            side.parent[nextState] = (state, action)
+            side.push(nextState, newCost)
+
+            # A state reached from both sides closes a start-to-goal path
+            if nextState in other.g and newCost + other.g[nextState] < bestCost:
+                bestCost, meetingState = newCost + other.g[nextState], nextState
+
+        max_fringe_size = max(max_fringe_size, len(forward.open) + len(backward.open))
+
+    closedSize = len(forward.g) - len(forward.open) + len(backward.g) - len(backward.open)
+    if meetingState is None:
+        # Return empty path if not found
+        return stats.finish([], nodes_expanded, max_fringe_size, 0, closedSize)
+
+    actions = forward.pathTo(meetingState)[::-1] + backward.pathTo(meetingState)
+    bf = branching_factor(len(actions), nodes_expanded)
+    return stats.finish(actions, nodes_expanded, max_fringe_size, bf, closedSize)
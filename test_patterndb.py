@@ -0,0 +1,39 @@
+# test_patterndb.py
+# -----------------
+# Regression tests for the pattern database builds in patterndb.py, run with
+# python -m unittest (or pytest) from this directory.
+
+import os
+import tempfile
+import unittest
+
+import patterndb
+
+PATTERN = (1, 2, 3)
+
+
+class BuildPatternDatabaseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = patterndb.buildPatternDatabase(PATTERN, self.directory.name, verbose=False)
+        self.checksum = patterndb.checksum(self.path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def testMissingDatabaseIsRebuilt(self):
+        os.remove(self.path)
+        self.assertEqual(patterndb.buildPatternDatabase(PATTERN, self.directory.name, verbose=False), self.path)
+        self.assertEqual(patterndb.checksum(self.path), self.checksum)
+        self.assertTrue(patterndb.verifyPatternDatabase(PATTERN, self.directory.name))
+
+    def testCorruptDatabaseIsRebuilt(self):
+        with open(self.path, 'r+b') as file:
+            file.write(b'\x07')
+        patterndb.buildPatternDatabase(PATTERN, self.directory.name, verbose=False)
+        self.assertEqual(patterndb.checksum(self.path), self.checksum)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+# test_search.py
+# --------------
+# Regression tests for the searches in search.py, run with
+# python -m unittest (or pytest) from this directory.
+
+import os
+import pickle
+import random
+import tempfile
+import unittest
+
+import fifteenpuzzle
+import search
+
+
+def randomProblem(moves, seed):
+    """Returns the puzzle problem reached from the goal by moves random moves."""
+    random.seed(seed)
+    return fifteenpuzzle.FifteenPuzzleSearchProblem(fifteenpuzzle.createRandomFifteenPuzzle(moves))
+
+
+class GraphProblem(search.SearchProblem):
+    """A search problem over a graph given as a dict of node -> neighbours."""
+
+    def __init__(self, edges, start, goal):
+        self.edges = edges
+        self.start = start
+        self.goal = goal
+
+    def getStartState(self):
+        return self.start
+
+    def isGoalState(self, state):
+        return state == self.goal
+
+    def getSuccessors(self, state):
+        return [(neighbour, f'{state}->{neighbour}', 1) for neighbour in self.edges[state]]
+
+
+# Shortest path a-b-e-f of 3 steps; the branch through c and d is longer
+GRAPH = {'a': ['c', 'b'], 'b': ['a', 'e'], 'c': ['a', 'd'], 'd': ['c', 'e'], 'e': ['b', 'd', 'f'], 'f': ['e']}
+
+
+class OtherGoalProblem(fifteenpuzzle.FifteenPuzzleSearchProblem):
+    """The fifteen puzzle with a goal other than the canonical one."""
+
+    def __init__(self, puzzle, goal):
+        super().__init__(puzzle)
+        self.goal = goal
+
+    def isGoalState(self, state):
+        return state == self.goal
+
+
+def otherGoalProblem(moves, seed):
+    """Returns a problem from the canonical goal to a state moves random moves away."""
+    random.seed(seed)
+    return OtherGoalProblem(fifteenpuzzle.createRandomFifteenPuzzle(0),
+                            fifteenpuzzle.createRandomFifteenPuzzle(moves))
+
+
+class UninformedSearchTest(unittest.TestCase):
+
+    def testBreadthFirstSearchOnGraph(self):
+        self.assertEqual(search.breadthFirstSearch(GraphProblem(GRAPH, 'a', 'f')).solution, 3)
+        self.assertEqual(search.breadthFirstSearch(GraphProblem(GRAPH, 'a', 'a')).solution, 0)
+
+    def testBreadthFirstSearchWithOtherGoal(self):
+        for seed in range(3):
+            problem = otherGoalProblem(12, seed)
+            self.assertEqual(search.breadthFirstSearch(problem).solution,
+                             search.uniformCostSearch(problem).solution)
+
+    def testDepthFirstSearchOnGraph(self):
+        self.assertEqual(search.depthFirstSearch(GraphProblem(GRAPH, 'a', 'f')).solution, 3)
+        self.assertEqual(search.depthFirstSearch(GraphProblem(GRAPH, 'a', 'c'), maxDepth=3).solution, 1)
+
+    def testDepthFirstSearchWithOtherGoal(self):
+        problem = otherGoalProblem(4, 0)
+        result = search.depthFirstSearch(problem, maxDepth=6)
+        self.assertTrue(result.branching_factor)
+        self.assertGreaterEqual(result.solution, search.uniformCostSearch(problem).solution)
+
+    def testIterativeDeepeningSearchOnGraph(self):
+        self.assertEqual(search.iterativeDeepeningSearch(GraphProblem(GRAPH, 'a', 'f')).solution, 3)
+        self.assertEqual(search.iterativeDeepeningSearch(GraphProblem(GRAPH, 'a', 'd')).solution, 2)
+
+    def testIterativeDeepeningSearchWithOtherGoal(self):
+        for seed in range(3):
+            problem = otherGoalProblem(8, seed)
+            self.assertEqual(search.iterativeDeepeningSearch(problem).solution,
+                             search.uniformCostSearch(problem).solution)
+
+    def testPackedSearchesOnPuzzle(self):
+        problem = randomProblem(12, 3)
+        optimal = search.uniformCostSearch(problem).solution
+        self.assertEqual(search.breadthFirstSearch(problem).solution, optimal)
+        self.assertEqual(search.iterativeDeepeningSearch(problem).solution, optimal)
+
+
+class SMAStarSearchTest(unittest.TestCase):
+
+    def testMemoryLimitBelowTwoIsRejected(self):
+        problem = randomProblem(12, 3)
+        for memoryLimit in (0, 1):
+            with self.assertRaises(ValueError):
+                search.smaStarSearch(problem, search.h3, memoryLimit=memoryLimit, verbose=False)
+
+    def testSmallMemoryLimitFindsNoSolution(self):
+        problem = randomProblem(12, 3)
+        for memoryLimit in (2, 3, 5):
+            result = search.smaStarSearch(problem, search.h3, memoryLimit=memoryLimit, verbose=False)
+            self.assertEqual(result.solution, [])
+            self.assertLessEqual(result.peak_nodes, memoryLimit)
+
+    def testLargerMemoryLimitIsOptimal(self):
+        problem = randomProblem(12, 3)
+        optimal = len(search.aStarSearch(problem, search.h3).solution)
+        for memoryLimit in (20, 100):
+            result = search.smaStarSearch(problem, search.h3, memoryLimit=memoryLimit, verbose=False)
+            self.assertEqual(len(result.solution), optimal)
+            self.assertLessEqual(result.peak_nodes, memoryLimit)
+
+
+class AnytimeAStarSearchTest(unittest.TestCase):
+
+    def testBoundDecreasesToOne(self):
+        problem = randomProblem(100, 2)
+        optimal = len(search.aStarSearch(problem, search.h3).solution)
+        bounds = []
+        for maxNodes in (300, 1000, 3000, None):
+            result = search.anytimeAStarSearch(problem, search.h3, maxNodes=maxNodes, verbose=False)
+            self.assertTrue(result.solution)
+            self.assertGreaterEqual(result.bound, 1)
+            self.assertLessEqual(len(result.solution), result.bound * optimal)
+            bounds.append(result.bound)
+        self.assertEqual(bounds, sorted(bounds, reverse=True))
+        self.assertEqual(bounds[-1], 1)
+        self.assertEqual(len(result.solution), optimal)
+
+    def testNoSolutionHasNoBound(self):
+        result = search.anytimeAStarSearch(randomProblem(100, 2), search.h3, maxNodes=100, verbose=False)
+        self.assertIsNone(result.bound)
+
+
+class WalkingDistanceCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loaded = search._walkingDistances
+        search._walkingDistances = None
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = os.path.join(self.directory.name, 'walking_distance.pickle')
+
+    def tearDown(self):
+        search._walkingDistances = self.loaded
+        self.directory.cleanup()
+
+    def reload(self):
+        search._walkingDistances = None
+        return search.walkingDistances(self.cache)
+
+    def testCacheIsWrittenAndLoaded(self):
+        distances = search.walkingDistances(self.cache)
+        self.assertEqual(len(distances), search._WALKING_KEY_COUNT)
+        self.assertEqual(self.reload(), distances)
+
+    def testCorruptCacheIsRebuilt(self):
+        for contents in (b'', b'not a pickle', pickle.dumps([1, 2, 3]), pickle.dumps({1: 2})):
+            with open(self.cache, 'wb') as file:
+                file.write(contents)
+            self.assertEqual(len(self.reload()), search._WALKING_KEY_COUNT)
+            with open(self.cache, 'rb') as file:
+                self.assertEqual(pickle.load(file), search._walkingDistances)
+
+    def testUnwritableCacheStaysInMemory(self):
+        self.cache = os.path.join(self.directory.name, 'missing', 'walking_distance.pickle')
+        self.assertEqual(len(self.reload()), search._WALKING_KEY_COUNT)
+        self.assertFalse(os.path.exists(os.path.dirname(self.cache)))
+
+    def testEmptyCacheIsNotWritten(self):
+        self.cache = ''
+        self.assertEqual(len(self.reload()), search._WALKING_KEY_COUNT)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -29,6 +29,9 @@
 import sys
 import inspect
 import heapq, random
+import contextlib
+import os
+import uuid
 from io import StringIO
 
 
@@ -198,6 +201,9 @@ class PriorityQueue:
     def isEmpty(self):
         return len(self.heap) == 0
 
+    def __len__(self):
+        return len(self.heap)
+
     def update(self, item, priority):
         # If item already in priority queue with higher priority, update its priority and rebuild the heap.
         # If item already in priority queue with equal or lower priority, do nothing.
@@ -214,6 +220,153 @@ class PriorityQueue:
             self.push(item, priority)
 
 
+class BucketPriorityQueue:
+    """
+      A priority queue for small non-negative integer priorities, such as
+      A* f-values with unit step costs and an integer heuristic.  Items are
+      kept in one bucket per priority, and each bucket holds one stack per
+      depth (g-value), so push and pop are O(1) apart from skipping empty
+      buckets.  Among items of equal priority, pop returns the one pushed with
+      the largest depth, most recent first.
+    """
+
+    def __init__(self):
+        self.buckets = []  # buckets[priority][depth] -> stack of items
+        self.minPriority = 0  # No non-empty bucket below this priority
+        self.size = 0
+        self.count = 0  # Total number of pushes, as in PriorityQueue
+
+    def push(self, item, priority, depth=0):
+        buckets = self.buckets
+        while len(buckets) <= priority:
+            buckets.append([])
+        bucket = buckets[priority]
+        while len(bucket) <= depth:
+            bucket.append([])
+        bucket[depth].append(item)
+        if priority < self.minPriority:
+            self.minPriority = priority
+        self.size += 1
+        self.count += 1
+
+    def pop(self):
+        buckets = self.buckets
+        priority = self.minPriority
+        while not buckets[priority]:
+            priority += 1
+        self.minPriority = priority
+        bucket = buckets[priority]
+        item = bucket[-1].pop()
+        # Drop emptied stacks so that bucket[-1] is always the deepest non-empty one
+        while bucket and not bucket[-1]:
+            bucket.pop()
+        self.size -= 1
+        return item
+
+    def isEmpty(self):
+        return self.size == 0
+
+    def __len__(self):
+        return self.size
+
+
+class IndexedPriorityQueue:
+    """
+      A priority queue that keeps an index from each item to its position in
+      the heap.  Membership tests are O(1) and lowering the priority of a
+      queued item (decrease-key) is O(log n), instead of the linear scan and
+      heapify done by PriorityQueue.update.  Items must be hashable and are
+      held at most once; ties are broken by insertion order.
+    """
+
+    def __init__(self):
+        self.heap = []  # [priority, count, item] entries
+        self.index = {}  # item -> position of its entry in the heap
+        self.count = 0
+
+    def push(self, item, priority):
+        entry = [priority, self.count, item]
+        self.count += 1
+        self.heap.append(entry)
+        self.index[item] = len(self.heap) - 1
+        self._siftUp(len(self.heap) - 1)
+
+    def pop(self):
+        heap = self.heap
+        last = heap.pop()
+        if heap:
+            top = heap[0]
+            heap[0] = last
+            self.index[last[2]] = 0
+            self._siftDown(0)
+        else:
+            top = last
+        del self.index[top[2]]
+        return top[2]
+
+    def isEmpty(self):
+        return len(self.heap) == 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, item):
+        return item in self.index
+
+    def minimumPriority(self):
+        "Returns the lowest priority in the queue without removing its item"
+        return self.heap[0][0]
+
+    def update(self, item, priority):
+        """
+        Pushes the item if it is not queued, or lowers its priority if the new
+        one is smaller.  Returns True if the queue changed.
+        """
+        position = self.index.get(item)
+        if position is None:
+            self.push(item, priority)
+            return True
+        entry = self.heap[position]
+        if entry[0] <= priority:
+            return False
+        entry[0] = priority
+        self._siftUp(position)
+        return True
+
+    def _siftUp(self, position):
+        heap, index = self.heap, self.index
+        entry = heap[position]
+        while position > 0:
+            parentPosition = (position - 1) >> 1
+            parent = heap[parentPosition]
+            if entry < parent:
+                heap[position] = parent
+                index[parent[2]] = position
+                position = parentPosition
+            else:
+                break
+        heap[position] = entry
+        index[entry[2]] = position
+
+    def _siftDown(self, position):
+        heap, index = self.heap, self.index
+        size = len(heap)
+        entry = heap[position]
+        child = 2 * position + 1
+        while child < size:
+            if child + 1 < size and heap[child + 1] < heap[child]:
+                child += 1
+            if heap[child] < entry:
+                heap[position] = heap[child]
+                index[heap[position][2]] = position
+                position = child
+                child = 2 * position + 1
+            else:
+                break
+        heap[position] = entry
+        index[entry[2]] = position
+
+
 class PriorityQueueWithFunction(PriorityQueue):
     """
     Implements a priority queue with the same push/pop signature of the
@@ -671,6 +824,205 @@ class TimeoutFunction:
         return result
 
 
+@contextlib.contextmanager
+def atomicWrite(path, mode='wb'):
+    """
+    Opens a file to write in place of path under a temporary name of its
+    own, ending in '.tmp', and renames it to path once the block completes.
+    A file under its final name is thus never partial, even with several
+    processes writing it at once, and a failed block leaves no file behind.
+    """
+    temporary = f'{path}.{uuid.uuid4().hex}.tmp'
+    try:
+        with open(temporary, mode) as file:
+            yield file
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+class SearchBudget:
+    """
+    Cooperative limits for a search: a wall-clock deadline, given as a
+    time.monotonic() value, and a maximum number of expanded nodes.  Unlike
+    TimeoutFunction it needs no signal, so it works in any thread, and the
+    search keeps its statistics when the budget runs out.
+
+    Searches call exceeded(nodes) once per expansion.  The node count is
+    compared every time but the clock is only read every CLOCK_INTERVAL
+    calls, which keeps the check cheap.
+    """
+
+    CLOCK_INTERVAL = 256
+
+    def __init__(self, deadline=None, maxNodes=None):
+        self.deadline = deadline
+        self.maxNodes = maxNodes
+        self.countdown = 0
+
+    @classmethod
+    def create(cls, deadline=None, maxNodes=None):
+        """
+        Returns a budget, or None when there is no limit to check.
+        """
+        if deadline is None and maxNodes is None:
+            return None
+        return cls(deadline, maxNodes)
+
+    def exceeded(self, nodes):
+        """
+        Returns 'maxNodes' or 'deadline' once that limit is reached after the
+        given number of expanded nodes, and None otherwise.
+        """
+        if self.maxNodes is not None and nodes >= self.maxNodes:
+            return 'maxNodes'
+        if self.deadline is not None:
+            self.countdown -= 1
+            if self.countdown <= 0:
+                self.countdown = self.CLOCK_INTERVAL
+                if time.monotonic() >= self.deadline:
+                    return 'deadline'
+        return None
+
+
+class SearchStats:
+    """
+    Statistics of one search run, returned by every search in search.py.  It
+    iterates, indexes and unpacks like the legacy (solution, nodes expanded,
+    max fringe size, branching factor) tuple, where the max fringe size is
+    the true peak size of the open list.  The other fields are:
+
+      nodes_generated    successors produced by the problem
+      duplicates_pruned  successors dropped as already reached at no higher
+                         cost, and stale queue entries skipped
+      reopenings         closed states reopened after a cheaper path was found
+      peak_closed_size   largest number of expanded states kept at once
+      peak_nodes         largest number of search nodes held in memory at
+                         once, for the memory-bounded searches (SMA*), and
+                         None for the others
+      generation_ns, heuristic_ns, queue_ns
+                         time spent generating successors, evaluating the
+                         heuristic and in priority queue operations, or None
+                         for a phase the search does not time (see
+                         timePhases): only aStarSearch and
+                         uniformCostSearch time theirs
+      total_ns           wall-clock time of the whole search
+      memory             estimated peak bytes per search structure, for the
+                         searches that measure it (see aStarSearch)
+      worker_expansions  nodes expanded by each worker process, for the
+                         parallel searches that track it (see
+                         parallelsearch.hdaStarSearch), and None otherwise
+      bound              suboptimality bound of the solution returned, for
+                         the anytime searches (see anytimeAStarSearch), and
+                         None otherwise
+
+    Counters that cost a step per successor and the phase timers are only
+    collected while SearchStats.detailed is set (see enable), so that plain
+    runs pay no more than a flag test.  Times come from time.perf_counter_ns.
+    """
+
+    detailed = False
+
+    FIELDS = ('nodes_expanded', 'nodes_generated', 'duplicates_pruned', 'reopenings', 'max_fringe_size',
+              'peak_closed_size', 'peak_nodes', 'generation_ns', 'heuristic_ns', 'queue_ns', 'total_ns')
+
+    def __init__(self):
+        self.solution = None
+        self.branching_factor = 0
+        self.memory = {}
+        self.worker_expansions = None
+        self.bound = None
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+        self.peak_nodes = None
+        self.generation_ns = self.heuristic_ns = self.queue_ns = None
+        self.startNs = time.perf_counter_ns()
+
+    @classmethod
+    def enable(cls, detailed=True):
+        """
+        Switches the collection of the detailed counters and timers on or off
+        for every search started afterwards.
+        """
+        cls.detailed = detailed
+
+    def timePhases(self, *phases):
+        """
+        Starts the given phase timers, such as 'queue_ns', at 0 for a search
+        that measures them; the others stay None.
+        """
+        for phase in phases:
+            setattr(self, phase, 0)
+
+    def finish(self, solution, nodes_expanded, max_fringe_size, branching_factor, peak_closed_size=None):
+        """
+        Records the legacy results, the closed list size if given and the
+        total time, and returns self.
+        """
+        self.total_ns = time.perf_counter_ns() - self.startNs
+        if peak_closed_size is not None:
+            self.peak_closed_size = peak_closed_size
+        self.solution = solution
+        self.nodes_expanded = nodes_expanded
+        self.max_fringe_size = max_fringe_size
+        self.branching_factor = branching_factor
+        return self
+
+    def asDict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __iter__(self):
+        return iter((self.solution, self.nodes_expanded, self.max_fringe_size, self.branching_factor))
+
+    def __len__(self):
+        return 4
+
+    def __getitem__(self, index):
+        return tuple(self)[index]
+
+    def __eq__(self, other):
+        if isinstance(other, (SearchStats, tuple)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def _fields(self):
+        return ', '.join(f"{field}={value}" for field, value in self.asDict().items())
+
+    def __repr__(self):
+        return f"SearchStats(solution={self.solution!r}, {self._fields()})"
+
+
+class BudgetExceeded(SearchStats):
+    """
+    The outcome of a search stopped by its SearchBudget.  It unpacks like the
+    result of a search that found no solution -- (solution, nodes expanded,
+    max fringe size, 0) -- and also carries the partial statistics: reason
+    ('deadline' or 'maxNodes'), bestF (the highest f, or depth or cost for
+    the uninformed searches, that the search had reached), the counters of
+    the SearchStats collected so far and fringe_size.
+    """
+
+    def __init__(self, reason, solution, nodes_expanded, fringe_size, bestF, stats=None):
+        super().__init__()
+        if stats is not None:
+            self.__dict__.update(stats.__dict__)
+        self.finish(solution, nodes_expanded, fringe_size, 0)
+        self.reason = reason
+        self.bestF = bestF
+
+    @property
+    def fringe_size(self):
+        return self.max_fringe_size
+
+    def __repr__(self):
+        return (f"BudgetExceeded(reason={self.reason!r}, bestF={self.bestF}, solution={self.solution!r}, "
+                f"{self._fields()})")
+
+
 _ORIGINAL_STDOUT = None
 _ORIGINAL_STDERR = None
 _MUTED = False